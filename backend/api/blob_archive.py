@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from api.blob_codec import BLOB_SIZE, decode
+from api.http_client import http_request
+from api.singleflight import SingleFlight
+
+load_dotenv()
+
+
+# EIP-4844 versioned hashes: 0x01 (KZG version byte) + 31 bytes of sha256(commitment)
+VERSIONED_HASH_PATTERN = re.compile(r"^0x01[0-9a-f]{62}$")
+
+DEFAULT_BLOB_SOURCES = ["https://api.sepolia.blobscan.com/blobs/{versioned_hash}"]
+
+
+def _from_hex(value: str) -> bytes:
+    return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+
+
+def commitment_versioned_hash(commitment: str) -> str:
+    """EIP-4844 versioned hash of a hex KZG commitment: 0x01 || sha256(commitment)[1:]."""
+    return "0x01" + hashlib.sha256(_from_hex(commitment)).hexdigest()[2:]
+
+
+def parse_blob_response(content: bytes) -> Tuple[bytes, Optional[str]]:
+    """
+    Raw blob bytes from a blob source response, with the KZG commitment when the source
+    reports one. Accepts the raw 131072 bytes, a 0x-hex string, or a JSON object with the
+    hex blob under "data" or "blob" and the commitment under "commitment" or
+    "kzg_commitment" (blobscan and beacon sidecar style).
+    """
+    if len(content) == BLOB_SIZE:
+        return content, None
+    text = content.strip()
+    commitment = None
+    if text.startswith(b"{"):
+        body = json.loads(text)
+        commitment = body.get("commitment") or body.get("kzg_commitment")
+        text = (body.get("data") or body.get("blob") or "").encode()
+    blob = _from_hex(text.strip().strip(b'"').decode())
+    if len(blob) != BLOB_SIZE:
+        raise ValueError(f"Blob source returned {len(blob)} bytes, expected {BLOB_SIZE}")
+    return blob, commitment
+
+
+class BlobArchive:
+    """
+    Permanent local archive of blobs, addressed by versioned hash.
+
+    Beacon nodes prune blob sidecars after ~18 days, so every blob fetched from a source is
+    written here once and served from disk from then on. Files are raw 131072-byte blobs
+    (two-level fan-out by hash prefix). Sources are URL templates with a {versioned_hash}
+    placeholder, tried in order; any HTTP server (a blob explorer, a beacon proxy or a
+    local stub) can serve them.
+
+    The archive trusts its sources: when a source reports the blob's KZG commitment, the
+    commitment is checked against the versioned hash before archiving, but the blob itself
+    is not KZG-verified against the commitment.
+    """
+
+    def __init__(self, directory: str, sources: List[str], timeout: float):
+        self.directory = directory
+        self.sources = sources
+        self.timeout = timeout
+        self._inflight = SingleFlight()
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "BlobArchive":
+        configured = os.getenv("BLOB_SOURCE_URLS") or os.getenv("BLOB_SOURCE_URL", "")
+        sources = [s.strip() for s in configured.split(",") if s.strip()]
+        return cls(
+            directory=os.getenv("BLOB_ARCHIVE_DIR", "/tmp/kaisign/blobs"),
+            sources=sources or DEFAULT_BLOB_SOURCES,
+            timeout=float(os.getenv("BLOB_SOURCE_TIMEOUT", "15")),
+        )
+
+    def _path(self, versioned_hash: str) -> str:
+        return os.path.join(self.directory, versioned_hash[4:6], f"{versioned_hash}.blob")
+
+    def read_payload(self, versioned_hash: str) -> Optional[bytes]:
+        """Decoded payload of an archived blob, or None when it is not archived (or is corrupt)."""
+        path = self._path(versioned_hash)
+        try:
+            with open(path, "rb") as f:
+                # Read rather than mmap: a failed decode keeps views of its input alive in the
+                # traceback, and an mmap with exported buffers cannot be closed
+                blob = f.read()
+        except OSError:
+            return None
+        try:
+            return decode(blob)
+        except ValueError as e:
+            print(f"Discarding corrupt archived blob {versioned_hash}: {e}")
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            return None
+
+    def store(self, versioned_hash: str, blob: bytes) -> None:
+        path = self._path(versioned_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    async def _fetch(self, versioned_hash: str) -> bytes:
+        errors = []
+        for template in self.sources:
+            url = template.format(versioned_hash=versioned_hash)
+            try:
+                response = await http_request("GET", url, timeout=self.timeout)
+                response.raise_for_status()
+                blob, commitment = parse_blob_response(response.content)
+                if commitment is not None and commitment_versioned_hash(commitment) != versioned_hash:
+                    raise ValueError(f"commitment {commitment} does not match the versioned hash")
+                # Validates the layout before anything is archived
+                payload = decode(blob)
+            except Exception as e:
+                print(f"Failed to fetch blob from {url}: {e}")
+                errors.append(str(e))
+                continue
+            self.store(versioned_hash, blob)
+            return payload
+        raise LookupError(f"Blob {versioned_hash} not available from any source: {'; '.join(errors)}")
+
+    async def get_payload(self, versioned_hash: str) -> bytes:
+        """Decoded payload for a versioned hash, from the archive or else from the sources."""
+        versioned_hash = versioned_hash.lower()
+        if not VERSIONED_HASH_PATTERN.match(versioned_hash):
+            raise ValueError(f"Invalid blob versioned hash: {versioned_hash}")
+        payload = self.read_payload(versioned_hash)
+        if payload is not None:
+            return payload
+        return await self._inflight.do(versioned_hash, lambda: self._fetch(versioned_hash))
+
+
+blob_archive = BlobArchive.from_env()
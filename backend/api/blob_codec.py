@@ -0,0 +1,82 @@
+"""
+EIP-4844 blob codec for ERC7730 specs, matching toBlobs in lambda/kms-blob-lambda.js.
+
+A blob is 4096 field elements of 32 bytes. Each field element carries 31 payload bytes
+after a zero high byte (keeping it below the BLS modulus), so payload byte i lives at
+blob[(i // 31) * 32 + 1 + i % 31] and one blob holds 126976 bytes. The Lambda truncates
+anything longer; here larger payloads are split across consecutive blobs. Packing and
+unpacking are single NumPy reshapes, and decoding reads straight from any buffer
+(bytes, memoryview, mmap) without copying it first.
+"""
+from typing import Iterable, List, Union
+
+import numpy as np
+
+FIELD_ELEMENTS_PER_BLOB = 4096
+BYTES_PER_FIELD_ELEMENT = 32
+PAYLOAD_BYTES_PER_FIELD_ELEMENT = 31
+BLOB_SIZE = FIELD_ELEMENTS_PER_BLOB * BYTES_PER_FIELD_ELEMENT  # 131072
+BLOB_CAPACITY = FIELD_ELEMENTS_PER_BLOB * PAYLOAD_BYTES_PER_FIELD_ELEMENT  # 126976
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def blobs_needed(length: int) -> int:
+    return max(1, -(-length // BLOB_CAPACITY))
+
+
+def encode_blobs(data: Buffer) -> List[bytes]:
+    """Pack data into as many blobs as needed; the last blob is zero-padded."""
+    payload = np.frombuffer(data, dtype=np.uint8)
+    count = blobs_needed(payload.size)
+    padded = np.zeros(count * BLOB_CAPACITY, dtype=np.uint8)
+    padded[:payload.size] = payload
+    blobs = np.zeros((count * FIELD_ELEMENTS_PER_BLOB, BYTES_PER_FIELD_ELEMENT), dtype=np.uint8)
+    blobs[:, 1:] = padded.reshape(-1, PAYLOAD_BYTES_PER_FIELD_ELEMENT)
+    flat = blobs.reshape(count, BLOB_SIZE)
+    return [row.tobytes() for row in flat]
+
+
+def encode_blob(data: Buffer) -> bytes:
+    """Single blob exactly as the Lambda's toBlobs builds it (payload beyond capacity is dropped)."""
+    return encode_blobs(memoryview(data)[:BLOB_CAPACITY])[0]
+
+
+def _field_elements(buffer: Buffer) -> np.ndarray:
+    """View of a buffer holding one or more whole blobs as (n, 32) field elements, without copying."""
+    view = np.frombuffer(buffer, dtype=np.uint8)
+    if view.size == 0 or view.size % BLOB_SIZE:
+        raise ValueError(f"Blob data must be a non-empty multiple of {BLOB_SIZE} bytes, got {view.size}")
+    elements = view.reshape(-1, BYTES_PER_FIELD_ELEMENT)
+    if elements[:, 0].any():
+        raise ValueError("Field element with a non-zero high byte: not a toBlobs-encoded blob")
+    return elements
+
+
+def _payload(elements: np.ndarray) -> bytes:
+    """Payload bytes of (n, 32) field elements, with trailing zero padding removed."""
+    data = elements[:, 1:]
+    # Padding is zeros; specs are JSON text, which never ends in a NUL byte
+    rows = np.flatnonzero(data.any(axis=1))
+    if not rows.size:
+        return b""
+    last = rows[-1]
+    end = last * PAYLOAD_BYTES_PER_FIELD_ELEMENT + np.flatnonzero(data[last])[-1] + 1
+    return data[:last + 1].tobytes()[:end]
+
+
+def decode(buffer: Buffer) -> bytes:
+    """
+    Payload of one blob, or of several blobs laid out back to back (e.g. an mmap'd file),
+    with trailing zero padding removed. The input is read in place, not copied.
+    """
+    return _payload(_field_elements(buffer))
+
+
+def decode_blobs(blobs: Iterable[Buffer]) -> bytes:
+    """Payload split across separate blob buffers, in order."""
+    elements = [_field_elements(blob) for blob in blobs]
+    if not elements:
+        return b""
+    # Every blob but the last is full, so only the last one carries padding
+    return b"".join(e[:, 1:].tobytes() for e in elements[:-1]) + _payload(elements[-1])
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+from fastapi import HTTPException
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# Generates one item (a Props dict) and returns its serialized descriptor
+Generator = Callable[[dict], Awaitable[bytes]]
+
+
+class BulkJob:
+    """
+    A bulk generation job. Items are generated in the background with bounded concurrency,
+    independently of any client connection; streams replay finished items and then follow
+    the rest as they complete.
+    """
+
+    def __init__(self, job_id: str, items: List[dict]):
+        self.job_id = job_id
+        self.items = items
+        self.lines: List[Optional[bytes]] = [None] * len(items)
+        # Item indices in completion order; streams walk this list
+        self.completed: List[int] = []
+        self.created_at = time.time()
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return len(self.completed) == len(self.items)
+
+    def _line(self, index: int, body: Optional[bytes], status: int, detail: str = "") -> bytes:
+        head = f'{{"job_id":"{self.job_id}","index":{index},"status":{status}'.encode()
+        if body is not None:
+            # The descriptor is embedded as already-serialized JSON, not re-encoded
+            return head + b',"descriptor":' + body + b"}\n"
+        return head + b',"detail":' + json.dumps(detail).encode() + b"}\n"
+
+    async def _complete(self, index: int, line: bytes) -> None:
+        async with self._changed:
+            self.lines[index] = line
+            self.completed.append(index)
+            self._changed.notify_all()
+
+    async def run(self, generate: Generator, concurrency: int, retry_delay: float) -> None:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_item(index: int) -> None:
+            async with semaphore:
+                while True:
+                    try:
+                        line = self._line(index, await generate(self.items[index]), 200)
+                    except HTTPException as e:
+                        if e.status_code == 503:
+                            # Generation pool saturated: bulk items wait instead of failing
+                            await asyncio.sleep(retry_delay)
+                            continue
+                        line = self._line(index, None, e.status_code, str(e.detail))
+                    except Exception as e:
+                        line = self._line(index, None, 500, f"Unexpected error: {e}")
+                    break
+            await self._complete(index, line)
+
+        await asyncio.gather(*(run_item(i) for i in range(len(self.items))))
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        position = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: position < len(self.completed) or self.finished)
+                ready = self.completed[position:]
+            for index in ready:
+                yield self.lines[index]
+            position += len(ready)
+            if self.finished and position == len(self.completed):
+                return
+
+    def status(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "items": len(self.items),
+            "completed": len(self.completed),
+            "finished": self.finished,
+            # False for a persisted job that has not been resumed since a restart
+            "running": self.task is not None and not self.task.done(),
+            "created_at": self.created_at,
+        }
+
+
+class BulkJobStore:
+    """
+    Running and recent bulk jobs, kept in memory. Job definitions are also persisted to
+    SQLite (from a thread, off the event loop), so a job id stays resumable across restarts:
+    it is restarted from its items, and items whose descriptors are already cached complete
+    immediately.
+    """
+
+    def __init__(self, db_path: Optional[str], max_jobs: int, ttl: float, concurrency: int, retry_delay: float):
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.retry_delay = retry_delay
+        self._jobs: "OrderedDict[str, BulkJob]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS bulk_jobs ("
+                "job_id TEXT PRIMARY KEY, items TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> "BulkJobStore":
+        return cls(
+            db_path=os.getenv("BULK_JOBS_PATH", "/tmp/kaisign/bulk_jobs.sqlite3"),
+            max_jobs=int(os.getenv("BULK_MAX_JOBS", "100")),
+            ttl=float(os.getenv("BULK_JOB_TTL", str(7 * 24 * 3600))),
+            concurrency=int(os.getenv("BULK_CONCURRENCY", os.getenv("GENERATION_WORKERS", "4"))),
+            retry_delay=float(os.getenv("GENERATION_RETRY_AFTER", "5")),
+        )
+
+    def _persist(self, job: BulkJob) -> None:
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute("DELETE FROM bulk_jobs WHERE created_at < ?", (time.time() - self.ttl,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO bulk_jobs (job_id, items, created_at) VALUES (?, ?, ?)",
+                (job.job_id, json.dumps(job.items), job.created_at),
+            )
+            self._db.commit()
+
+    def _load(self, job_id: str) -> Optional[BulkJob]:
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT items, created_at FROM bulk_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        job = BulkJob(job_id, json.loads(row[0]))
+        job.created_at = row[1]
+        return job
+
+    def _start(self, job: BulkJob, generate: Generator) -> BulkJob:
+        self._jobs[job.job_id] = job
+        # Forget the oldest finished jobs beyond max_jobs; running jobs are never dropped
+        for job_id in [j for j, old in self._jobs.items() if old.finished][: max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+        job.task = asyncio.create_task(job.run(generate, self.concurrency, self.retry_delay))
+        return job
+
+    async def create(self, items: List[dict], generate: Generator) -> BulkJob:
+        job = BulkJob(uuid.uuid4().hex, items)
+        await asyncio.to_thread(self._persist, job)
+        return self._start(job, generate)
+
+    async def get(self, job_id: str, generate: Generator) -> Optional[BulkJob]:
+        """Return a known job, restarting it from its persisted definition if needed."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        job = await asyncio.to_thread(self._load, job_id)
+        # Another request may have restarted the same job while this one was loading
+        if job_id in self._jobs:
+            return self._jobs[job_id]
+        return self._start(job, generate) if job is not None else None
+
+    async def status(self, job_id: str) -> Optional[dict]:
+        """Progress of a job, read-only: a persisted job is reported as stored, never resumed."""
+        job = self._jobs.get(job_id) or await asyncio.to_thread(self._load, job_id)
+        return job.status() if job is not None else None
+
+    async def stop(self) -> None:
+        tasks = [job.task for job in self._jobs.values() if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+bulk_jobs = BulkJobStore.from_env()
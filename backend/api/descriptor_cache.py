@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+from eth_utils import keccak, to_checksum_address
+
+from api.lru import SizedLRU
+
+load_dotenv()
+
+
+class DescriptorCache:
+    """
+    Two-tier cache of serialized ERC7730 descriptors.
+    Values are the final JSON response bytes, so hits bypass pydantic and response encoding.
+    Memory hits are served inline; SQLite reads and writes run in a thread, off the event loop.
+    """
+
+    def __init__(self, max_bytes: int, db_path: Optional[str], ttl: float):
+        self.ttl = ttl
+        self.memory = SizedLRU(max_bytes)
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS descriptors ("
+                "key TEXT PRIMARY KEY, body BLOB NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> "DescriptorCache":
+        return cls(
+            max_bytes=int(os.getenv("DESCRIPTOR_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            db_path=os.getenv("DESCRIPTOR_CACHE_PATH", "/tmp/kaisign/descriptors.sqlite3"),
+            ttl=float(os.getenv("DESCRIPTOR_CACHE_TTL", str(24 * 3600))),
+        )
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl > 0 and time.time() - stored_at > self.ttl
+
+    def _disk_get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT body, stored_at FROM descriptors WHERE key = ?", (key,)
+            ).fetchone()
+        return (bytes(row[0]), row[1]) if row is not None else None
+
+    def _disk_set(self, key: str, body: bytes, stored_at: float) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO descriptors (key, body, stored_at) VALUES (?, ?, ?)",
+                (key, body, stored_at),
+            )
+            self._db.commit()
+
+    def _disk_delete(self, key: str) -> bool:
+        with self._db_lock:
+            cursor = self._db.execute("DELETE FROM descriptors WHERE key = ?", (key,))
+            self._db.commit()
+        return cursor.rowcount > 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            body, stored_at = entry
+            if not self._expired(stored_at):
+                return body
+            await self.invalidate(key)
+            return None
+
+        if self._db is None:
+            return None
+        row = await asyncio.to_thread(self._disk_get, key)
+        if row is None:
+            return None
+        body, stored_at = row
+        if self._expired(stored_at):
+            await self.invalidate(key)
+            return None
+        self.memory.set(key, (body, stored_at), len(body))
+        return body
+
+    async def set(self, key: str, body: bytes) -> None:
+        stored_at = time.time()
+        self.memory.set(key, (body, stored_at), len(body))
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, body, stored_at)
+
+    async def invalidate(self, key: str) -> bool:
+        removed = self.memory.pop(key)
+        if self._db is not None:
+            removed = await asyncio.to_thread(self._disk_delete, key) or removed
+        return removed
+
+
+def descriptor_cache_key(abi: Optional[str], address: Optional[str], chain_id: int) -> Optional[str]:
+    """
+    Cache key for a generation request, mirroring run_erc7730's precedence:
+    keccak of the normalized ABI JSON when an ABI is given, else (chain_id, checksummed address).
+    """
+    if abi:
+        try:
+            normalized = json.dumps(json.loads(abi), sort_keys=True, separators=(",", ":"))
+        except ValueError:
+            normalized = abi.strip()
+        return f"abi:{chain_id}:{keccak(text=normalized).hex()}"
+    if address:
+        try:
+            address = to_checksum_address(address)
+        except ValueError:
+            address = address.lower()
+        return f"address:{chain_id}:{address}"
+    return None
+
+
+descriptor_cache = DescriptorCache.from_env()
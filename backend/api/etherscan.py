@@ -0,0 +1,234 @@
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+from eth_utils import to_checksum_address
+
+from api.http_client import http_request
+from api.ratelimit import TokenBucket
+from api.singleflight import SingleFlight
+
+load_dotenv()
+
+
+class EtherscanError(Exception):
+    """Etherscan answered, but without a usable verified ABI."""
+
+    def __init__(self, message: str, unverified: bool = False):
+        super().__init__(message)
+        # True when the contract itself has no verified source (worth remembering for a while)
+        self.unverified = unverified
+
+
+class ContractABI:
+    def __init__(self, abi: str, implementation: Optional[str] = None):
+        self.abi = abi
+        # Set when the address is a proxy and abi is its implementation's ABI
+        self.implementation = implementation
+
+
+class ABIStore:
+    """
+    SQLite store of Etherscan lookups keyed by (chain_id, address).
+    Verified ABIs are kept forever, except a proxy's resolved implementation ABI, which
+    expires after proxy_ttl so upgrades are picked up; unverified results expire after
+    negative_ttl.
+    """
+
+    def __init__(self, db_path: str, negative_ttl: float, proxy_ttl: float):
+        self.negative_ttl = negative_ttl
+        self.proxy_ttl = proxy_ttl
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS abis ("
+            "chain_id INTEGER NOT NULL, address TEXT NOT NULL, abi TEXT, implementation TEXT, "
+            "error TEXT, fetched_at REAL NOT NULL, PRIMARY KEY (chain_id, address))"
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def get(self, chain_id: int, address: str) -> Optional[Tuple[Optional[ContractABI], Optional[str]]]:
+        """(abi, None) for a verified contract, (None, error) for a recent miss, None if unknown."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT abi, implementation, error, fetched_at FROM abis WHERE chain_id = ? AND address = ?",
+                (chain_id, address),
+            ).fetchone()
+        if row is None:
+            return None
+        abi, implementation, error, fetched_at = row
+        if abi is not None:
+            if implementation is not None and time.time() - fetched_at > self.proxy_ttl:
+                return None
+            return ContractABI(abi, implementation), None
+        if time.time() - fetched_at > self.negative_ttl:
+            return None
+        return None, error
+
+    def set(self, chain_id: int, address: str, abi: Optional[ContractABI], error: Optional[str] = None) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO abis (chain_id, address, abi, implementation, error, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    chain_id,
+                    address,
+                    abi.abi if abi else None,
+                    abi.implementation if abi else None,
+                    error,
+                    time.time(),
+                ),
+            )
+            self._db.commit()
+
+    def delete(self, chain_id: int, address: str) -> bool:
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM abis WHERE chain_id = ? AND address = ?", (chain_id, address)
+            )
+            self._db.commit()
+        return cursor.rowcount > 0
+
+
+class EtherscanABIProvider:
+    """
+    Backend-owned verified-ABI source used for address-based generation.
+
+    Each API key has its own token bucket and requests rotate across keys. Lookups are
+    persisted per (chain_id, address) and identical concurrent lookups are coalesced, so
+    Etherscan is contacted once per contract. Proxies (as reported by Etherscan's
+    getsourcecode) resolve to their implementation's ABI.
+    """
+
+    def __init__(
+        self,
+        api_keys: List[str],
+        api_url: str,
+        store: ABIStore,
+        rate: float,
+        burst: float,
+        max_attempts: int,
+        timeout: float,
+    ):
+        self.api_keys = api_keys
+        self.api_url = api_url
+        self.store = store
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self._buckets = [TokenBucket(rate=rate, capacity=burst) for _ in api_keys]
+        self._next_key = 0
+        self._inflight = SingleFlight()
+
+    @classmethod
+    def from_env(cls) -> "EtherscanABIProvider":
+        keys = [k.strip() for k in os.getenv("ETHERSCAN_API_KEYS", "").split(",") if k.strip()]
+        if not keys and os.getenv("ETHERSCAN_API_KEY"):
+            keys = [os.getenv("ETHERSCAN_API_KEY")]
+        return cls(
+            api_keys=keys,
+            api_url=os.getenv("ETHERSCAN_API_URL", "https://api.etherscan.io/v2/api"),
+            store=ABIStore(
+                os.getenv("ETHERSCAN_ABI_STORE_PATH", "/tmp/kaisign/abis.sqlite3"),
+                negative_ttl=float(os.getenv("ETHERSCAN_NEGATIVE_TTL", "3600")),
+                proxy_ttl=float(os.getenv("ETHERSCAN_PROXY_TTL", "3600")),
+            ),
+            rate=float(os.getenv("ETHERSCAN_RATE_LIMIT", "4")),
+            burst=float(os.getenv("ETHERSCAN_RATE_BURST", "4")),
+            max_attempts=int(os.getenv("ETHERSCAN_MAX_ATTEMPTS", "3")),
+            timeout=float(os.getenv("ETHERSCAN_TIMEOUT", "15")),
+        )
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_keys)
+
+    async def _acquire_key(self) -> str:
+        # Prefer any key with budget left, starting from the rotation point
+        count = len(self.api_keys)
+        start = self._next_key
+        self._next_key = (start + 1) % count
+        for offset in range(count):
+            i = (start + offset) % count
+            if self._buckets[i].try_acquire():
+                return self.api_keys[i]
+        await self._buckets[start].acquire()
+        return self.api_keys[start]
+
+    async def _get_source(self, chain_id: int, address: str) -> dict:
+        last_error = "no attempts made"
+        for attempt in range(self.max_attempts):
+            api_key = await self._acquire_key()
+            response = await http_request(
+                "GET",
+                self.api_url,
+                params={
+                    "chainid": chain_id,
+                    "module": "contract",
+                    "action": "getsourcecode",
+                    "address": address,
+                    "apikey": api_key,
+                },
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            data = response.json()
+            result = data.get("result")
+            if data.get("status") == "1" and isinstance(result, list) and result:
+                return result[0]
+            last_error = result if isinstance(result, str) else data.get("message", "Etherscan error")
+            if "rate limit" not in last_error.lower():
+                raise EtherscanError(last_error)
+            await asyncio.sleep(random.uniform(0.5, 1.0) * 2 ** attempt)
+        raise EtherscanError(last_error)
+
+    async def _fetch(self, chain_id: int, address: str) -> ContractABI:
+        source = await self._get_source(chain_id, address)
+        implementation = source.get("Implementation") or None
+        if source.get("Proxy") == "1" and implementation and to_checksum_address(implementation) != address:
+            implementation = to_checksum_address(implementation)
+            impl = await self.get_abi(chain_id, implementation)
+            return ContractABI(impl.abi, implementation)
+        abi = source.get("ABI", "")
+        try:
+            json.loads(abi)
+        except ValueError:
+            # Unverified contracts answer "Contract source code not verified" in place of the ABI
+            raise EtherscanError(abi or "Contract source code not verified", unverified=True)
+        return ContractABI(abi)
+
+    async def _lookup(self, chain_id: int, address: str) -> ContractABI:
+        stored = await asyncio.to_thread(self.store.get, chain_id, address)
+        if stored is not None:
+            abi, error = stored
+            if abi is None:
+                raise EtherscanError(error, unverified=True)
+            return abi
+        try:
+            abi = await self._fetch(chain_id, address)
+        except EtherscanError as e:
+            if e.unverified:
+                await asyncio.to_thread(self.store.set, chain_id, address, None, str(e))
+            raise
+        await asyncio.to_thread(self.store.set, chain_id, address, abi)
+        return abi
+
+    async def get_abi(self, chain_id: int, address: str) -> ContractABI:
+        """Verified ABI for a contract (the implementation's for proxies)."""
+        if not self.api_keys:
+            raise EtherscanError("Missing/Invalid API Key: ETHERSCAN_API_KEY is not set")
+        address = to_checksum_address(address)
+        return await self._inflight.do(f"{chain_id}:{address}", lambda: self._lookup(chain_id, address))
+
+    async def invalidate(self, chain_id: int, address: str) -> bool:
+        """Forget the stored lookup for a contract, so the next one asks Etherscan again."""
+        return await asyncio.to_thread(self.store.delete, chain_id, to_checksum_address(address))
+
+
+etherscan_abi_provider = EtherscanABIProvider.from_env()
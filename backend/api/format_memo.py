@@ -0,0 +1,122 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from dotenv import load_dotenv
+from eth_utils import keccak
+
+from api.lru import SizedLRU
+from api.patched_erc7730 import generate_descriptor_json, original_generate_descriptor
+
+load_dotenv()
+
+
+def canonical_type(param: dict) -> str:
+    """Solidity canonical type of an ABI parameter, expanding tuples into their components."""
+    abi_type = param.get("type", "")
+    if abi_type.startswith("tuple"):
+        inner = ",".join(canonical_type(c) for c in param.get("components") or [])
+        return f"({inner}){abi_type[len('tuple'):]}"
+    return abi_type
+
+
+def function_signature(entry: dict) -> str:
+    """Signature used as the display.formats key, e.g. transfer(address,uint256)."""
+    return f"{entry.get('name', '')}({','.join(canonical_type(p) for p in entry.get('inputs') or [])})"
+
+
+def is_function(entry: dict) -> bool:
+    # "type" defaults to "function" in the ABI JSON spec
+    return entry.get("type", "function") == "function"
+
+
+def entry_key(entry: dict) -> str:
+    # Parameter names and mutability feed labels and fields, so the whole entry is the key
+    return keccak(text=json.dumps(entry, sort_keys=True, separators=(",", ":"))).hex()
+
+
+class FormatMemo:
+    """
+    Per-function memo of generated display.formats entries, shared across ABIs.
+
+    The generator only keeps functions (events, errors, constructors, fallback and receive
+    entries never reach context.contract.abi), so only functions are memoized. For each one
+    the memo keeps the entry as the generator normalizes it and the generated format (or
+    None when the generator emits none, e.g. for view functions). Generating a descriptor
+    only runs the erc7730 generator over functions not seen before, matched back to the
+    generated ABI by signature; everything else is merged from the memo. Any output that
+    does not have the expected shape falls back to full generation.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.entries = SizedLRU(max_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "FormatMemo":
+        return cls(max_bytes=int(os.getenv("FORMAT_MEMO_MAX_BYTES", str(16 * 1024 * 1024))))
+
+    def _remember(self, key: str, value: Tuple[Any, Optional[Tuple[str, Any]]]) -> None:
+        self.entries.set(key, value, len(orjson.dumps(value)))
+
+    def generate_json(self, chain_id: int, contract_address: str, abi: str) -> bytes:
+        """Drop-in for generate_descriptor_json(chain_id=..., contract_address=..., abi=...)."""
+        try:
+            entries = json.loads(abi)
+        except ValueError:
+            entries = None
+        if not isinstance(entries, list) or not all(isinstance(e, dict) for e in entries):
+            return generate_descriptor_json(chain_id=chain_id, contract_address=contract_address, abi=abi)
+        try:
+            return self._generate(chain_id, contract_address, entries)
+        except Exception as e:
+            print(f"Format memo fallback to full generation: {e}")
+            return generate_descriptor_json(chain_id=chain_id, contract_address=contract_address, abi=abi)
+
+    def _generate(self, chain_id: int, contract_address: str, entries: List[dict]) -> bytes:
+        functions = [entry for entry in entries if is_function(entry)]
+        if not functions:
+            raise ValueError("no functions in ABI")
+        keys = [entry_key(entry) for entry in functions]
+        memoized = {key: self.entries.get(key) for key in dict.fromkeys(keys)}
+        unseen = list({key: i for i, key in enumerate(keys) if memoized[key] is None}.values())
+        self.hits += len(keys) - len(unseen)
+        self.misses += len(unseen)
+
+        # The generator always needs a function to work on; a memoized one is cheap to redo
+        subset = unseen or [0]
+        signatures = [function_signature(functions[i]) for i in subset]
+        if len(set(signatures)) != len(signatures):
+            raise ValueError("ABI has several entries with the same signature")
+        result = original_generate_descriptor(
+            chain_id=chain_id,
+            contract_address=contract_address,
+            abi=json.dumps([functions[i] for i in subset]),
+        )
+        descriptor = result.model_dump(mode="json", by_alias=False)
+        generated_abi = {function_signature(e): e for e in descriptor["context"]["contract"]["abi"]}
+        generated_formats: Dict[str, Any] = descriptor["display"]["formats"]
+
+        for i, signature in zip(subset, signatures):
+            if signature not in generated_abi:
+                raise ValueError(f"generator dropped {signature}")
+            fmt = (signature, generated_formats[signature]) if signature in generated_formats else None
+            memoized[keys[i]] = (generated_abi[signature], fmt)
+            self._remember(keys[i], memoized[keys[i]])
+
+        formats: Dict[str, Any] = {}
+        for key in keys:
+            fmt = memoized[key][1]
+            if fmt is not None:
+                formats.setdefault(fmt[0], fmt[1])
+        descriptor["context"]["contract"]["abi"] = [memoized[key][0] for key in keys]
+        descriptor["display"]["formats"] = formats
+        return orjson.dumps(descriptor)
+
+    def stats(self) -> dict:
+        return {"entries": len(self.entries), "bytes": self.entries.size, "hits": self.hits, "misses": self.misses}
+
+
+format_memo = FormatMemo.from_env()
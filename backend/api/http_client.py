@@ -0,0 +1,76 @@
+import asyncio
+import importlib.util
+import os
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# App-lifetime client shared by all outbound RPC and gateway calls.
+# Created in the FastAPI lifespan hook; lazily created if used outside of it.
+_client: Optional[httpx.AsyncClient] = None
+_host_slots: Dict[str, asyncio.Semaphore] = {}
+
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+
+
+def _build_client() -> httpx.AsyncClient:
+    # HTTP/2 needs the optional h2 package (installed by httpx[http2])
+    http2 = (
+        os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+        and importlib.util.find_spec("h2") is not None
+    )
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(
+            float(os.getenv("HTTP_TIMEOUT", "30")),
+            connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+        ),
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+        ),
+        headers={"User-Agent": "kaisign-backend"},
+    )
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _host_slots.clear()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+def _host_slot(url: str) -> asyncio.Semaphore:
+    # httpx only limits connections pool-wide, so cap concurrent requests per host here
+    host = urlsplit(url).netloc
+    slot = _host_slots.get(host)
+    if slot is None:
+        slot = _host_slots[host] = asyncio.Semaphore(HTTP_MAX_CONNECTIONS_PER_HOST)
+    return slot
+
+
+async def http_request(method: str, url: str, **kwargs) -> httpx.Response:
+    """Send a request through the shared client, bounded by the per-host concurrency limit."""
+    async with _host_slot(url):
+        return await get_http_client().request(method, url, **kwargs)
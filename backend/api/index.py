@@ -1,20 +1,20 @@
-from fastapi import FastAPI, HTTPException, Path, Request
+from fastapi import Depends, FastAPI, HTTPException, Path, Request
 from fastapi.middleware.cors import CORSMiddleware
 from subprocess import Popen, PIPE
 from dotenv import load_dotenv
 import os
 import json
-import requests
-from typing import Optional, List
+import re
+from typing import Dict, Optional, List
 import asyncio
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 # Import patched version first to apply the monkeypatches
 import api.patched_erc7730
 
 # Now import the regular modules which will have the patches applied
-from erc7730.generate.generate import generate_descriptor
 from erc7730.model.input.descriptor import InputERC7730Descriptor
 from erc7730.model.display import FieldFormat, AddressNameType
 from erc7730.model.input.context import InputContractContext, InputEIP712Context, InputContract, InputEIP712
@@ -22,12 +22,30 @@ from erc7730.model.input.display import InputDisplay, InputFieldDescription, Inp
 from erc7730.model.input.metadata import InputMetadata
 import traceback
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from api.healthcheck import router as healthcheck_router
 from fastapi.exceptions import RequestValidationError
 from api.kms_routes import router as kms_router
 from api.relay import router as relay_router
+from api.tx_relay import tx_relay
+from api.workers import generation_pool
+from api.descriptor_cache import descriptor_cache, descriptor_cache_key
+from api.format_memo import format_memo
+from api.bulk_jobs import BulkJob, bulk_jobs
+from api.etherscan import etherscan_abi_provider
+from api.singleflight import SingleFlight
+from api.http_client import close_http_client, start_http_client
+from api.rpc import RpcError
+from api.rpc_pool import read_rpc_pool, write_rpc_pool
+from api.ipfs_gateways import gateway_selector
+from api.ipfs_cache import IPFSDocument, ipfs_document_cache, verify_cid
+from api.spec_cache import RevealWatcher, spec_hash_cache
+from api.indexer_routes import init_indexer, router as indexer_router
+from api.security import enforce_api_key
+from api.blob_archive import blob_archive
+from eth_abi import decode as abi_decode
+from eth_utils import keccak
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 # Configure logging
@@ -43,35 +61,68 @@ load_dotenv()
 USE_MOCK = os.getenv("USE_MOCK", "false").lower() == "true"
 
 # Environment variables for contract interaction
-ALCHEMY_RPC_URL = os.getenv("ALCHEMY_RPC_URL")
 KAISIGN_CONTRACT_ADDRESS = os.getenv("KAISIGN_CONTRACT_ADDRESS", "0x4dFEA0C2B472a14cD052a8f9DF9f19fa5CF03719")
+# Background indexer of KaiSign events (INDEXER_ENABLED), served under /indexer
+event_indexer = init_indexer(KAISIGN_CONTRACT_ADDRESS)
+# Number of eth_call reads sent per JSON-RPC batch by the batch metadata endpoint
+RPC_BATCH_SIZE = max(1, int(os.getenv("RPC_BATCH_SIZE", "50")))
+# Limits for the batch metadata endpoints
+BATCH_MAX_SPEC_IDS = int(os.getenv("BATCH_MAX_SPEC_IDS", "1000"))
+BATCH_CONCURRENCY = max(1, int(os.getenv("BATCH_CONCURRENCY", "16")))
+# Items accepted per bulk descriptor generation request
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "200"))
 
 def load_env():
-    etherscan_api_key = os.getenv("ETHERSCAN_API_KEY")
-    if not etherscan_api_key:
+    if not etherscan_abi_provider.configured:
         raise HTTPException(
             status_code=500,
             detail="ETHERSCAN_API_KEY environment variable is not set. Please configure it in your environment."
         )
-    env = os.environ.copy()
-    env["ETHERSCAN_API_KEY"] = etherscan_api_key
-    # We're using in-memory cache instead of file-based cache
-    # but keep this env var for compatibility with other parts of the code
-    env["XDG_CACHE_HOME"] = '/tmp'
     load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_http_client()
+    # Drops negative specID -> IPFS hash entries as new blocks and reveals arrive
+    reveal_watcher = RevealWatcher(
+        spec_hash_cache,
+        rpc=read_rpc_pool,
+        contract_address=KAISIGN_CONTRACT_ADDRESS,
+        poll_interval=float(os.getenv("SPEC_CACHE_POLL_INTERVAL", "12")),
+        warmup_blocks=int(os.getenv("SPEC_CACHE_WARMUP_BLOCKS", "0")),
+        max_log_range=int(os.getenv("SPEC_CACHE_MAX_LOG_RANGE", "2000")),
+        warm=fetch_ipfs_hashes_from_contract,
+    )
+    background_tasks = [asyncio.create_task(reveal_watcher.run())]
+    tx_relay.start()
+    if event_indexer is not None:
+        background_tasks.append(asyncio.create_task(event_indexer.run()))
+    try:
+        yield
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        await tx_relay.stop()
+        await bulk_jobs.stop()
+        await close_http_client()
+        generation_pool.shutdown()
+
 app = FastAPI(
     title="ERC7730 API", 
     description="API for generating ERC7730 descriptors",
     version="1.0.0",
     docs_url="/docs",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 # Include the healthcheck router
 app.include_router(healthcheck_router)
 app.include_router(kms_router)
 app.include_router(relay_router)
+app.include_router(indexer_router)
+app.include_router(indexer_router, prefix="/api/py")
 
 # Configure CORS with specific origins
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
@@ -84,6 +135,9 @@ app.add_middleware(
     allow_headers=["Content-Type", "Authorization", "X-API-Key"],
 )
 
+# Concurrent identical generation requests share a single run, keyed like the descriptor cache
+inflight_generations = SingleFlight()
+
 class Message(BaseModel):
     message: str
 
@@ -92,6 +146,9 @@ class Props(BaseModel):
     address: str | None = None
     chain_id: int | None = None
 
+class BulkGenerationRequest(BaseModel):
+    items: List[Props]
+
 class IPFSMetadataRequest(BaseModel):
     spec_id: str
 
@@ -105,6 +162,11 @@ class IPFSMetadataResponse(BaseModel):
 class BatchIPFSMetadataRequest(BaseModel):
     spec_ids: List[str]
 
+class BlobMetadataRequest(BaseModel):
+    spec_id: Optional[str] = None
+    contract_address: Optional[str] = None
+    chain_id: Optional[int] = None
+
 class BatchIPFSMetadataResponse(BaseModel):
     results: List[IPFSMetadataResponse]
 
@@ -117,7 +179,8 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
             "error": "HTTP Error",
             "message": str(exc.detail),
             "timestamp": datetime.utcnow().isoformat()
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(RequestValidationError)
@@ -219,127 +282,233 @@ def generate_mock_descriptor(address: str, chain_id: int = 1):
         }
     }
 
-async def fetch_ipfs_hash_from_contract(spec_id: str) -> Optional[str]:
-    """Fetch IPFS hash from the contract using the specID."""
-    try:
-        if not ALCHEMY_RPC_URL:
-            raise Exception("ALCHEMY_RPC_URL environment variable is not set")
-        
-        # Prepare the JSON-RPC request for eth_call
-        contract_call_data = {
-            "jsonrpc": "2.0",
-            "method": "eth_call",
-            "params": [
-                {
-                    "to": KAISIGN_CONTRACT_ADDRESS,
-                    "data": f"0xe90ffed8{spec_id[2:].zfill(64)}"  # getIPFSByHash function selector + padded specID
-                },
-                "latest"
-            ],
-            "id": 1
-        }
-        
-        # Use asyncio.to_thread to make requests async-compatible
-        def make_request():
-            response = requests.post(ALCHEMY_RPC_URL, json=contract_call_data, timeout=30)
-            response.raise_for_status()
-            return response.json()
+def ipfs_hash_call(spec_id: str) -> tuple:
+    """JSON-RPC (method, params) reading the IPFS hash stored for a specID."""
+    return (
+        "eth_call",
+        [
+            {
+                "to": KAISIGN_CONTRACT_ADDRESS,
+                "data": f"0xe90ffed8{spec_id[2:].zfill(64)}"  # getIPFSByHash function selector + padded specID
+            },
+            "latest"
+        ]
+    )
+
+def decode_ipfs_hash(hex_result: str) -> Optional[str]:
+    """Decode the ABI-encoded string returned by getIPFSByHash."""
+    # Decode the hex response to get the IPFS hash
+    if not hex_result or hex_result == "0x":
+        return None
         
-        result = await asyncio.to_thread(make_request)
+    # Remove 0x prefix and decode
+    hex_data = hex_result[2:]
+    if len(hex_data) < 128:  # Minimum length for string response
+        return None
         
-        if "error" in result:
-            raise Exception(f"RPC error: {result['error']}")
+    # Skip the first 64 characters (offset) and next 64 characters (length)
+    # Then decode the actual string data
+    try:
+        # Get the length of the string (bytes 32-63)
+        length_hex = hex_data[64:128]
+        length = int(length_hex, 16)
         
-        # Decode the hex response to get the IPFS hash
-        hex_result = result["result"]
-        if hex_result == "0x":
+        if length == 0:
             return None
             
-        # Remove 0x prefix and decode
-        hex_data = hex_result[2:]
-        if len(hex_data) < 128:  # Minimum length for string response
-            return None
-            
-        # Skip the first 64 characters (offset) and next 64 characters (length)
-        # Then decode the actual string data
-        try:
-            # Get the length of the string (bytes 32-63)
-            length_hex = hex_data[64:128]
-            length = int(length_hex, 16)
-            
-            if length == 0:
-                return None
-                
-            # Get the actual string data
-            string_hex = hex_data[128:128 + (length * 2)]
-            ipfs_hash = bytes.fromhex(string_hex).decode('utf-8')
-            
-            return ipfs_hash if ipfs_hash else None
-            
-        except Exception as decode_error:
-            print(f"Error decoding contract response: {decode_error}")
-            return None
+        # Get the actual string data
+        string_hex = hex_data[128:128 + (length * 2)]
+        ipfs_hash = bytes.fromhex(string_hex).decode('utf-8')
+        
+        return ipfs_hash if ipfs_hash else None
+        
+    except Exception as decode_error:
+        print(f"Error decoding contract response: {decode_error}")
+        return None
+
+async def fetch_ipfs_hash_from_contract(spec_id: str) -> Optional[str]:
+    """Fetch IPFS hash from the contract using the specID."""
+    try:
+        hit, ipfs_hash = spec_hash_cache.get(spec_id)
+        if hit:
+            return ipfs_hash
+
+        if not read_rpc_pool.configured:
+            raise Exception("No RPC endpoint configured (set RPC_URLS or ALCHEMY_RPC_URL)")
+        
+        method, call_params = ipfs_hash_call(spec_id)
+        hex_result = await read_rpc_pool.call(method, call_params)
+        ipfs_hash = decode_ipfs_hash(hex_result)
+        spec_hash_cache.set(spec_id, ipfs_hash)
+        return ipfs_hash
             
     except Exception as e:
         print(f"Error fetching IPFS hash from contract: {e}")
         return None
 
+async def fetch_ipfs_hashes_from_contract(spec_ids: List[str]) -> Dict[str, Optional[str]]:
+    """
+    Fetch IPFS hashes for many specIDs using JSON-RPC batch requests of RPC_BATCH_SIZE calls.
+    Lookups that fail map to None, like fetch_ipfs_hash_from_contract.
+    """
+    hashes: Dict[str, Optional[str]] = {}
+    unique_ids = []
+    for spec_id in dict.fromkeys(spec_ids):
+        hit, hashes[spec_id] = spec_hash_cache.get(spec_id)
+        if not hit:
+            unique_ids.append(spec_id)
+    if not unique_ids:
+        return hashes
+    if not read_rpc_pool.configured:
+        print("Error fetching IPFS hash from contract: no RPC endpoint configured (set RPC_URLS or ALCHEMY_RPC_URL)")
+        return hashes
+
+    async def fetch_chunk(chunk: List[str]) -> None:
+        try:
+            results = await read_rpc_pool.batch([ipfs_hash_call(spec_id) for spec_id in chunk])
+        except Exception as e:
+            print(f"Error fetching IPFS hash batch from contract: {e}")
+            return
+        for spec_id, result in zip(chunk, results):
+            if isinstance(result, RpcError):
+                print(f"Error fetching IPFS hash from contract: {result}")
+                continue
+            hashes[spec_id] = decode_ipfs_hash(result)
+            spec_hash_cache.set(spec_id, hashes[spec_id])
+
+    chunks = [unique_ids[i:i + RPC_BATCH_SIZE] for i in range(0, len(unique_ids), RPC_BATCH_SIZE)]
+    await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks))
+    return hashes
+
+def parse_ipfs_metadata(body: bytes) -> IPFSDocument:
+    """Parse an ERC7730 document fetched from IPFS and extract contract address and chain ID."""
+    metadata = json.loads(body)
+    
+    # Extract contract address and chain ID from metadata
+    contract_address = None
+    chain_id = None
+    
+    # Check new ERC7730 format first: context.contract.deployments
+    if (metadata.get("context", {}).get("contract", {}).get("deployments")):
+        deployments = metadata["context"]["contract"]["deployments"]
+        if deployments and len(deployments) > 0:
+            deployment = deployments[0]
+            contract_address = deployment.get("address")
+            chain_id = deployment.get("chainId")
+    
+    # Fall back to old format: context.eip712.deployments
+    if not contract_address and (metadata.get("context", {}).get("eip712", {}).get("deployments")):
+        deployments = metadata["context"]["eip712"]["deployments"]
+        if deployments and len(deployments) > 0:
+            deployment = deployments[0]
+            contract_address = deployment.get("address")
+            chain_id = deployment.get("chainId")
+    
+    return IPFSDocument(contract_address=contract_address, chain_id=chain_id, raw=body)
+
 async def fetch_ipfs_metadata(ipfs_hash: str) -> dict:
     """Fetch metadata from IPFS and extract contract address and chain ID."""
     try:
-        # Try multiple IPFS gateways
-        gateways = [
-            f"https://ipfs.io/ipfs/{ipfs_hash}",
-            f"https://gateway.pinata.cloud/ipfs/{ipfs_hash}",
-            f"https://cloudflare-ipfs.com/ipfs/{ipfs_hash}"
-        ]
-        
-        for gateway_url in gateways:
-            try:
-                # Use asyncio.to_thread to make requests async-compatible
-                def make_request():
-                    response = requests.get(gateway_url, timeout=10)
-                    response.raise_for_status()
-                    return response.json()
-                
-                metadata = await asyncio.to_thread(make_request)
-                
-                # Extract contract address and chain ID from metadata
-                contract_address = None
-                chain_id = None
-                
-                # Check new ERC7730 format first: context.contract.deployments
-                if (metadata.get("context", {}).get("contract", {}).get("deployments")):
-                    deployments = metadata["context"]["contract"]["deployments"]
-                    if deployments and len(deployments) > 0:
-                        deployment = deployments[0]
-                        contract_address = deployment.get("address")
-                        chain_id = deployment.get("chainId")
-                
-                # Fall back to old format: context.eip712.deployments
-                if not contract_address and (metadata.get("context", {}).get("eip712", {}).get("deployments")):
-                    deployments = metadata["context"]["eip712"]["deployments"]
-                    if deployments and len(deployments) > 0:
-                        deployment = deployments[0]
-                        contract_address = deployment.get("address")
-                        chain_id = deployment.get("chainId")
-                
-                return {
-                    "contract_address": contract_address,
-                    "chain_id": chain_id,
-                    "metadata": metadata
-                }
-                
-            except Exception as gateway_error:
-                print(f"Failed to fetch from {gateway_url}: {gateway_error}")
-                continue
-        
-        raise Exception("Failed to fetch from all IPFS gateways")
+        # IPFS content is immutable, so a cached CID never needs a network round-trip
+        document = await ipfs_document_cache.get(ipfs_hash)
+        if document is None:
+            def parse(body: bytes) -> IPFSDocument:
+                if verify_cid(ipfs_hash, body) is False:
+                    raise ValueError(f"Gateway content does not match CID {ipfs_hash}")
+                return parse_ipfs_metadata(body)
+
+            # Gateways are ranked by latency/error rate and hedged; unparseable or
+            # mismatching bodies count as failures
+            document = await gateway_selector.fetch(ipfs_hash, parse=parse)
+            await ipfs_document_cache.set(ipfs_hash, document)
+
+        return {
+            "contract_address": document.contract_address,
+            "chain_id": document.chain_id,
+            "raw": document.raw
+        }
         
     except Exception as e:
         print(f"Error fetching IPFS metadata: {e}")
         raise e
 
+async def generate_descriptor_body(params: Props, chain_id: int) -> bytes:
+    """
+    Run descriptor generation in the worker pool and return the serialized response body.
+    The descriptor is encoded to JSON once, inside the worker, with no intermediate dict.
+    """
+    result = None
+
+    if (params.abi):
+        try:
+            # Functions already generated for another ABI are merged from the memo
+            result = await generation_pool.run(
+                format_memo.generate_json,
+                chain_id=chain_id,
+                contract_address='0xdeadbeef00000000000000000000000000000000', # because it's mandatory mock address see with laurent
+                abi=params.abi
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            error_detail = f"Error with ABI: {str(e)}"
+            raise HTTPException(status_code=500, detail=error_detail)
+
+    if (params.address and not result):
+        try:
+            # Verified ABIs come from the backend's rate-limited, persistent Etherscan store,
+            # so each contract is fetched from Etherscan once (proxies resolve to their implementation)
+            contract_abi = await etherscan_abi_provider.get_abi(chain_id, params.address)
+            # Etherscan ABIs include events and errors; the memo skips them like the generator does
+            result = await generation_pool.run(
+                format_memo.generate_json,
+                chain_id=chain_id,
+                contract_address=params.address,
+                abi=contract_abi.abi
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            error_detail = f"Error with address: {str(e)}"
+            if "Missing/Invalid API Key" in str(e):
+                raise HTTPException(
+                    status_code=500,
+                    detail="Etherscan API key is missing or invalid. Please check your configuration."
+                )
+            raise HTTPException(status_code=500, detail=error_detail)
+
+    if result is None:
+        raise HTTPException(status_code=400, detail="No ABI or address provided")
+
+    return result
+
+async def generate_and_cache_descriptor(params: Props, chain_id: int, cache_key: str) -> bytes:
+    body = await generate_descriptor_body(params, chain_id)
+    await descriptor_cache.set(cache_key, body)
+    return body
+
+async def get_descriptor_body(params: Props) -> bytes:
+    """Serialized descriptor for params: from the cache, an identical in-flight generation, or a new one."""
+    # we only manage ethereum mainnet
+    chain_id = params.chain_id or 1
+
+    if USE_MOCK:
+        # Use mock data in testing/development
+        address = params.address or "0x0000000000000000000000000000000000000000"
+        return JSONResponse(content=generate_mock_descriptor(address, chain_id)).body
+
+    cache_key = descriptor_cache_key(params.abi, params.address, chain_id)
+    if cache_key is None:
+        raise HTTPException(status_code=400, detail="No ABI or address provided")
+
+    # Cached descriptors are stored pre-serialized, so hits skip pydantic and JSON encoding
+    body = await descriptor_cache.get(cache_key)
+    if body is None:
+        body = await inflight_generations.do(
+            cache_key, lambda: generate_and_cache_descriptor(params, chain_id, cache_key)
+        )
+    return body
+
 # Explicitly remove response_model validation to avoid Pydantic validation issues in deployment
 @app.post("/generateERC7730")
 @app.post("/api/py/generateERC7730")
@@ -348,61 +517,9 @@ async def run_erc7730(params: Props):
     try:
         # Proceed with actual implementation
         load_env()
-        result = None
-
-        # we only manage ethereum mainnet
-        chain_id = params.chain_id or 1
-        
-        if USE_MOCK:
-            # Use mock data in testing/development
-            address = params.address or "0x0000000000000000000000000000000000000000"
-            return JSONResponse(content=generate_mock_descriptor(address, chain_id))
-        
-        if (params.abi):
-            try:
-                result = generate_descriptor(
-                    chain_id=chain_id,
-                    contract_address='0xdeadbeef00000000000000000000000000000000', # because it's mandatory mock address see with laurent
-                    abi=params.abi
-                )
-            except Exception as e:
-                error_detail = f"Error with ABI: {str(e)}"
-                raise HTTPException(status_code=500, detail=error_detail)
-       
-        if (params.address and not result):
-            try:
-                result = generate_descriptor(
-                    chain_id=chain_id,
-                    contract_address=params.address
-                )
-            except Exception as e:
-                error_detail = f"Error with address: {str(e)}"
-                if "Missing/Invalid API Key" in str(e):
-                    raise HTTPException(
-                        status_code=500,
-                        detail="Etherscan API key is missing or invalid. Please check your configuration."
-                    )
-                raise HTTPException(status_code=500, detail=error_detail)
-            
-        if result is None:
-            raise HTTPException(status_code=400, detail="No ABI or address provided")
 
-        # The result should already be a serializable dict thanks to our patch
-        # But we'll add a fallback just in case
-        try:
-            # If it's already a dict, this should work fine
-            return JSONResponse(content=result)
-        except Exception as e:
-            # If there's still an issue, try more aggressive serialization
-            try:
-                # Try our make_serializable function from the patch
-                from api.patched_erc7730 import make_serializable
-                serialized_result = make_serializable(result)
-                return JSONResponse(content=serialized_result)
-            except Exception as nested_exc:
-                # Last resort, convert to string representation
-                error_msg = f"Failed to serialize: {str(e)}. Nested error: {str(nested_exc)}"
-                raise HTTPException(status_code=500, detail=error_msg)
+        body = await get_descriptor_body(params)
+        return Response(content=body, media_type="application/json")
 
     except HTTPException as e:
         raise e
@@ -410,6 +527,75 @@ async def run_erc7730(params: Props):
         error_detail = f"Unexpected error: {str(e)}"
         raise HTTPException(status_code=500, detail=error_detail)
 
+async def generate_bulk_item(item: dict) -> bytes:
+    return await get_descriptor_body(Props(**item))
+
+def bulk_stream_response(job: BulkJob) -> StreamingResponse:
+    return StreamingResponse(
+        job.stream(), media_type="application/x-ndjson", headers={"X-Job-Id": job.job_id}
+    )
+
+@app.post("/generateERC7730Bulk")
+@app.post("/api/py/generateERC7730Bulk")
+async def run_erc7730_bulk(request: BulkGenerationRequest):
+    """
+    Generate descriptors for many contracts. Items run in parallel through the generation pool
+    and stream back as NDJSON lines {"job_id", "index", "status", "descriptor" | "detail"}
+    in completion order. The job keeps running if the client disconnects; reconnect with
+    GET /generateERC7730Bulk/{job_id} (job id also in the X-Job-Id header).
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No items provided")
+    if len(request.items) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many items: {len(request.items)} (max {BULK_MAX_ITEMS})"
+        )
+    load_env()
+    job = await bulk_jobs.create([item.model_dump() for item in request.items], generate_bulk_item)
+    return bulk_stream_response(job)
+
+@app.get("/generateERC7730Bulk/{job_id}")
+@app.get("/api/py/generateERC7730Bulk/{job_id}")
+async def resume_erc7730_bulk(job_id: str):
+    """Replay a bulk job's finished items, then stream the rest as they complete."""
+    job = await bulk_jobs.get(job_id, generate_bulk_item)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id")
+    return bulk_stream_response(job)
+
+@app.get("/generateERC7730Bulk/{job_id}/status")
+@app.get("/api/py/generateERC7730Bulk/{job_id}/status")
+async def bulk_job_status(job_id: str):
+    """Progress of a bulk job. Read-only: a job persisted before a restart is not resumed here."""
+    status = await bulk_jobs.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id")
+    return status
+
+@app.post("/invalidateDescriptorCache", dependencies=[Depends(enforce_api_key)])
+@app.post("/api/py/invalidateDescriptorCache", dependencies=[Depends(enforce_api_key)])
+async def invalidate_descriptor_cache(params: Props):
+    """
+    Drop the cached descriptor for an ABI or (chain_id, address). For an address, the stored
+    Etherscan ABI is dropped too, so the next generation picks up e.g. a proxy upgrade.
+    """
+    chain_id = params.chain_id or 1
+    cache_key = descriptor_cache_key(params.abi, params.address, chain_id)
+    if cache_key is None:
+        raise HTTPException(status_code=400, detail="No ABI or address provided")
+    abi_invalidated = False
+    if params.address and not params.abi:
+        try:
+            abi_invalidated = await etherscan_abi_provider.invalidate(chain_id, params.address)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid contract address")
+    return {
+        "key": cache_key,
+        "invalidated": await descriptor_cache.invalidate(cache_key),
+        "abi_invalidated": abi_invalidated,
+    }
+
 @app.post("/getIPFSMetadata")
 @app.post("/api/py/getIPFSMetadata")
 async def get_ipfs_metadata(request: IPFSMetadataRequest):
@@ -457,18 +643,29 @@ async def get_ipfs_metadata(request: IPFSMetadataRequest):
         error_detail = f"Unexpected error: {str(e)}"
         raise HTTPException(status_code=500, detail=error_detail)
 
-async def process_single_spec_id(spec_id: str) -> IPFSMetadataResponse:
-    """Process a single specID asynchronously and independently."""
+def is_valid_spec_id(spec_id: str) -> bool:
+    return bool(spec_id) and spec_id.startswith("0x") and len(spec_id) == 66
+
+async def process_single_spec_id(
+    spec_id: str, ipfs_hashes: Optional[Dict[str, Optional[str]]] = None
+) -> IPFSMetadataResponse:
+    """
+    Process a single specID asynchronously and independently.
+    ipfs_hashes holds hashes already read in a batch; otherwise the contract is queried.
+    """
     try:
         # Validate specID format
-        if not spec_id or not spec_id.startswith("0x") or len(spec_id) != 66:
+        if not is_valid_spec_id(spec_id):
             return IPFSMetadataResponse(
                 spec_id=spec_id,
                 error="Invalid specID format. Expected 32-byte hex string with 0x prefix."
             )
         
         # Fetch IPFS hash from contract
-        ipfs_hash = await fetch_ipfs_hash_from_contract(spec_id)
+        if ipfs_hashes is not None:
+            ipfs_hash = ipfs_hashes.get(spec_id)
+        else:
+            ipfs_hash = await fetch_ipfs_hash_from_contract(spec_id)
         
         if not ipfs_hash:
             return IPFSMetadataResponse(
@@ -500,26 +697,74 @@ async def process_single_spec_id(spec_id: str) -> IPFSMetadataResponse:
             error=f"Unexpected error: {str(e)}"
         )
 
+async def iter_batch_ipfs_metadata(spec_ids: List[str]):
+    """
+    Yield (index, IPFSMetadataResponse) for each specID as soon as it resolves.
+    Contract reads run chunk by chunk and at most BATCH_CONCURRENCY gateway fetches are in
+    flight, with bounded queues in between, so memory stays flat for large requests.
+    """
+    if not spec_ids:
+        return
+
+    worker_count = min(BATCH_CONCURRENCY, len(spec_ids))
+    work: asyncio.Queue = asyncio.Queue(maxsize=worker_count * 2)
+    done: asyncio.Queue = asyncio.Queue(maxsize=worker_count * 2)
+
+    async def produce():
+        for start in range(0, len(spec_ids), RPC_BATCH_SIZE):
+            chunk = spec_ids[start:start + RPC_BATCH_SIZE]
+            try:
+                ipfs_hashes = await fetch_ipfs_hashes_from_contract(
+                    [spec_id for spec_id in chunk if is_valid_spec_id(spec_id)]
+                )
+            except Exception as e:
+                print(f"Error fetching IPFS hash batch from contract: {e}")
+                ipfs_hashes = {}
+            for offset, spec_id in enumerate(chunk):
+                await work.put((start + offset, spec_id, ipfs_hashes))
+        for _ in range(worker_count):
+            await work.put(None)
+
+    async def consume():
+        while (item := await work.get()) is not None:
+            index, spec_id, ipfs_hashes = item
+            try:
+                result = await process_single_spec_id(spec_id, ipfs_hashes)
+            except Exception as e:
+                result = IPFSMetadataResponse(
+                    spec_id=spec_id,
+                    error=f"Processing error: {str(e)}"
+                )
+            await done.put((index, result))
+
+    tasks = [asyncio.create_task(produce())]
+    tasks += [asyncio.create_task(consume()) for _ in range(worker_count)]
+    try:
+        for _ in range(len(spec_ids)):
+            yield await done.get()
+    finally:
+        # Stop outstanding work if the client went away or the caller stopped iterating
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+def check_batch_size(request: BatchIPFSMetadataRequest) -> None:
+    if len(request.spec_ids) > BATCH_MAX_SPEC_IDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many specIDs: {len(request.spec_ids)} (max {BATCH_MAX_SPEC_IDS})"
+        )
+
 @app.post("/getBatchIPFSMetadata")
 @app.post("/api/py/getBatchIPFSMetadata")
 async def get_batch_ipfs_metadata(request: BatchIPFSMetadataRequest):
     """Fetch IPFS metadata for multiple specIDs asynchronously and independently."""
+    check_batch_size(request)
     try:
-        # Process all specIDs concurrently using asyncio.gather
-        # This makes each fetch independent and asynchronous
-        tasks = [process_single_spec_id(spec_id) for spec_id in request.spec_ids]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Convert any exceptions to error responses
-        processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                processed_results.append(IPFSMetadataResponse(
-                    spec_id=request.spec_ids[i],
-                    error=f"Processing error: {str(result)}"
-                ))
-            else:
-                processed_results.append(result)
+        # Bounded pipeline: batched contract reads, then at most BATCH_CONCURRENCY gateway fetches
+        processed_results: List[Optional[IPFSMetadataResponse]] = [None] * len(request.spec_ids)
+        async for index, result in iter_batch_ipfs_metadata(request.spec_ids):
+            processed_results[index] = result
         
         return BatchIPFSMetadataResponse(results=processed_results)
         
@@ -533,6 +778,188 @@ async def get_batch_ipfs_metadata(request: BatchIPFSMetadataRequest):
         ]
         return BatchIPFSMetadataResponse(results=error_results)
 
+@app.post("/getBatchIPFSMetadataStream")
+@app.post("/api/py/getBatchIPFSMetadataStream")
+async def stream_batch_ipfs_metadata(request: BatchIPFSMetadataRequest):
+    """
+    Streaming variant of getBatchIPFSMetadata.
+    Emits one IPFSMetadataResponse per line (NDJSON) in completion order.
+    """
+    check_batch_size(request)
+
+    async def lines():
+        async for _, result in iter_batch_ipfs_metadata(request.spec_ids):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+GET_SPEC_BLOB_HASH_SELECTOR = keccak(text="getSpecBlobHash(bytes32)")[:4].hex()
+GET_SPECS_BY_CONTRACT_SELECTOR = keccak(text="getSpecsByContract(address,uint256)")[:4].hex()
+SPECS_SELECTOR = keccak(text="specs(bytes32)")[:4].hex()
+REALITY_ETH_SELECTOR = keccak(text="realityETH()")[:4].hex()
+RESULT_FOR_SELECTOR = keccak(text="resultFor(bytes32)")[:4].hex()
+ZERO_BYTES32 = "0x" + "0" * 64
+# Fields returned by the public specs(bytes32) getter (KaiSign.ERC7730Spec)
+SPEC_STRUCT_TYPES = [
+    "uint64", "uint64", "uint8", "uint80", "uint32", "address", "address", "bytes32", "bytes32", "bytes32", "uint256"
+]
+# KaiSign.Status enum
+SPEC_STATUSES = ["Committed", "Submitted", "Proposed", "Finalized", "Cancelled"]
+# realityETH is immutable in KaiSign, so it is read once
+reality_eth_address: Optional[str] = None
+
+def spec_blob_hash_call(spec_id: str) -> tuple:
+    """JSON-RPC (method, params) reading the blob versioned hash stored for a specID."""
+    return (
+        "eth_call",
+        [{"to": KAISIGN_CONTRACT_ADDRESS, "data": f"0x{GET_SPEC_BLOB_HASH_SELECTOR}{spec_id[2:].zfill(64)}"}, "latest"]
+    )
+
+def pick_spec_with_blob(specs: List[dict]) -> Optional[dict]:
+    """
+    Spec to serve among a contract's specs (newest first, indexer row shape): accepted specs
+    first, then pending ones, newest first within each. Specs finalized as rejected are never served.
+    """
+    candidates = [
+        s for s in specs
+        if s.get("blob_hash") and int(s["blob_hash"], 16)
+        and not (s.get("status") == "Finalized" and s.get("is_accepted") != 1)
+    ]
+    candidates.sort(key=lambda s: s.get("is_accepted") != 1)
+    return candidates[0] if candidates else None
+
+async def read_spec_states(spec_ids: List[str]) -> List[dict]:
+    """
+    Status and blob hash of each specID from the specs(bytes32) getter, in batches, plus the
+    Reality.eth result of finalized ones, in the indexer's row shape.
+    """
+    global reality_eth_address
+    states = []
+    for start in range(0, len(spec_ids), RPC_BATCH_SIZE):
+        chunk = spec_ids[start:start + RPC_BATCH_SIZE]
+        results = await read_rpc_pool.batch([
+            ("eth_call", [{"to": KAISIGN_CONTRACT_ADDRESS, "data": f"0x{SPECS_SELECTOR}{spec_id[2:].zfill(64)}"}, "latest"])
+            for spec_id in chunk
+        ])
+        for spec_id, data in zip(chunk, results):
+            if not isinstance(data, str) or len(data) < 2 + 64 * len(SPEC_STRUCT_TYPES):
+                continue
+            fields = abi_decode(SPEC_STRUCT_TYPES, bytes.fromhex(data[2:]))
+            status = fields[2]
+            states.append({
+                "spec_id": spec_id,
+                "status": SPEC_STATUSES[status] if status < len(SPEC_STATUSES) else str(status),
+                "blob_hash": "0x" + fields[7].hex(),
+                "question_id": "0x" + fields[8].hex(),
+                "is_accepted": None,
+            })
+
+    # The accept/reject outcome is not stored in the spec; it is the Reality.eth answer
+    finalized = [s for s in states if s["status"] == "Finalized" and int(s["blob_hash"], 16)]
+    if finalized:
+        if reality_eth_address is None:
+            answer = await read_rpc_pool.call("eth_call", [
+                {"to": KAISIGN_CONTRACT_ADDRESS, "data": f"0x{REALITY_ETH_SELECTOR}"}, "latest"
+            ])
+            reality_eth_address = "0x" + answer[-40:]
+        for start in range(0, len(finalized), RPC_BATCH_SIZE):
+            chunk = finalized[start:start + RPC_BATCH_SIZE]
+            answers = await read_rpc_pool.batch([
+                ("eth_call", [{"to": reality_eth_address, "data": f"0x{RESULT_FOR_SELECTOR}{s['question_id'][2:]}"}, "latest"])
+                for s in chunk
+            ])
+            for spec, answer in zip(chunk, answers):
+                if isinstance(answer, str) and answer not in ("0x", ""):
+                    spec["is_accepted"] = int(int(answer, 16) == 1)
+    return states
+
+async def resolve_spec_blob(request: BlobMetadataRequest) -> tuple:
+    """
+    (spec_id, blob versioned hash) for a specID, or for the newest spec of a contract with a blob.
+    Contract lookups use the event indexer when enabled, else getSpecsByContract plus batched
+    specs(bytes32) and Reality.eth resultFor reads; both rank specs with pick_spec_with_blob.
+    """
+    if request.spec_id:
+        if not is_valid_spec_id(request.spec_id):
+            raise HTTPException(status_code=400, detail="Invalid specID format. Must be a 66-character hex string starting with 0x.")
+        blob_hash = await read_rpc_pool.call(*spec_blob_hash_call(request.spec_id))
+        if not blob_hash or int(blob_hash, 16) == 0:
+            raise HTTPException(status_code=404, detail="No blob hash recorded for this specID")
+        return request.spec_id, "0x" + blob_hash[2:].zfill(64)[-64:]
+
+    if not request.contract_address or request.chain_id is None:
+        raise HTTPException(status_code=400, detail="Provide spec_id, or contract_address and chain_id")
+    if not re.match(r"^0x[0-9a-fA-F]{40}$", request.contract_address):
+        raise HTTPException(status_code=400, detail="Invalid contract address")
+
+    if event_indexer is not None:
+        specs = await asyncio.to_thread(
+            event_indexer.store.specs_for_contract, request.contract_address, request.chain_id
+        )
+        best = pick_spec_with_blob(list(reversed(specs)))
+        if best is not None:
+            return best["spec_id"], best["blob_hash"]
+
+    result = await read_rpc_pool.call("eth_call", [{
+        "to": KAISIGN_CONTRACT_ADDRESS,
+        "data": (
+            f"0x{GET_SPECS_BY_CONTRACT_SELECTOR}{request.contract_address[2:].lower().zfill(64)}"
+            f"{request.chain_id:064x}"
+        ),
+    }, "latest"])
+    spec_ids = ["0x" + spec_id.hex() for spec_id in abi_decode(["bytes32[]"], bytes.fromhex(result[2:]))[0]]
+    spec_ids.reverse()
+    best = pick_spec_with_blob(await read_spec_states(spec_ids))
+    if best is not None:
+        return best["spec_id"], best["blob_hash"]
+    raise HTTPException(status_code=404, detail="No spec with a blob found for this contract")
+
+@app.post("/getBlobMetadata")
+@app.post("/api/py/getBlobMetadata")
+async def get_blob_metadata(request: BlobMetadataRequest):
+    """
+    Serve the ERC7730 JSON stored in a spec's EIP-4844 blob, by spec_id or by
+    (contract_address, chain_id). Blobs are archived locally the first time they are fetched,
+    so later reads are disk hits and survive beacon-node blob pruning.
+    """
+    if not read_rpc_pool.configured:
+        raise HTTPException(status_code=503, detail="No RPC endpoint configured (set RPC_URLS or ALCHEMY_RPC_URL)")
+    try:
+        spec_id, versioned_hash = await resolve_spec_blob(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Error reading spec blob hash from contract: {e}")
+
+    try:
+        payload = await blob_archive.get_payload(versioned_hash)
+    except ValueError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    try:
+        json.loads(payload)
+    except ValueError:
+        raise HTTPException(status_code=502, detail="Blob does not contain a JSON document")
+
+    return Response(
+        content=payload,
+        media_type="application/json",
+        headers={"X-Spec-Id": spec_id, "X-Blob-Versioned-Hash": versioned_hash},
+    )
+
+@app.get("/ipfsGatewayHealth")
+@app.get("/api/py/ipfsGatewayHealth")
+async def ipfs_gateway_health():
+    """Per-gateway latency and error figures used to rank IPFS gateways."""
+    return gateway_selector.health()
+
+@app.get("/rpcHealth")
+@app.get("/api/py/rpcHealth")
+async def rpc_health():
+    """Per-endpoint latency, error and cooldown figures of the read and relay RPC pools."""
+    return {"read": read_rpc_pool.health(), "relay": write_rpc_pool.health()}
+
 # Add a simple test route for health check
 @app.get("/")
 @app.get("/api/py")
@@ -0,0 +1,421 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from eth_abi import decode as abi_decode
+from eth_utils import keccak
+
+from api.rpc import RpcError
+from api.rpc_pool import RpcPool, read_rpc_pool
+
+load_dotenv()
+
+
+# KaiSign events as declared in contracts/src/KaiSign.sol: name -> [(arg, type, indexed)]
+EVENTS: Dict[str, List[Tuple[str, str, bool]]] = {
+    "LogCommitSpec": [
+        ("committer", "address", True),
+        ("commitmentId", "bytes32", True),
+        ("targetContract", "address", True),
+        ("chainId", "uint256", False),
+        ("bondAmount", "uint256", False),
+        ("revealDeadline", "uint64", False),
+    ],
+    "LogRevealSpec": [
+        ("creator", "address", True),
+        ("specID", "bytes32", True),
+        ("blobHash", "bytes32", True),
+        ("commitmentId", "bytes32", False),
+        ("targetContract", "address", False),
+        ("chainId", "uint256", False),
+    ],
+    "LogCreateSpec": [
+        ("creator", "address", True),
+        ("specID", "bytes32", True),
+        ("blobHash", "bytes32", True),
+        ("targetContract", "address", False),
+        ("chainId", "uint256", False),
+        ("timestamp", "uint256", False),
+        ("incentiveId", "bytes32", False),
+    ],
+    "LogProposeSpec": [
+        ("user", "address", True),
+        ("specID", "bytes32", True),
+        ("questionId", "bytes32", False),
+        ("bond", "uint256", False),
+    ],
+    "LogHandleResult": [
+        ("specID", "bytes32", True),
+        ("isAccepted", "bool", False),
+    ],
+    "LogIncentiveCreated": [
+        ("incentiveId", "bytes32", True),
+        ("creator", "address", True),
+        ("targetContract", "address", True),
+        ("chainId", "uint256", False),
+        ("amount", "uint256", False),
+        ("deadline", "uint64", False),
+        ("description", "string", False),
+    ],
+    "LogIncentiveClaimed": [
+        ("incentiveId", "bytes32", True),
+        ("claimer", "address", True),
+        ("specID", "bytes32", True),
+        ("amount", "uint256", False),
+    ],
+    "LogIncentiveClawback": [
+        ("incentiveId", "bytes32", True),
+        ("creator", "address", True),
+        ("amount", "uint256", False),
+    ],
+    "LogContractSpecAdded": [
+        ("targetContract", "address", True),
+        ("specID", "bytes32", True),
+        ("creator", "address", True),
+        ("chainId", "uint256", False),
+        ("blobHash", "bytes32", False),
+    ],
+}
+
+EVENT_TOPICS: Dict[str, str] = {
+    "0x" + keccak(text=f"{name}({','.join(t for _, t, _ in args)})").hex(): name
+    for name, args in EVENTS.items()
+}
+
+# The account that emitted the event, used for per-user queries
+USER_ARGS = ("committer", "creator", "user", "claimer")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    block_number INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    spec_id TEXT,
+    target_contract TEXT,
+    chain_id INTEGER,
+    user TEXT,
+    args TEXT NOT NULL,
+    UNIQUE (tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS idx_events_contract ON events (chain_id, target_contract);
+CREATE INDEX IF NOT EXISTS idx_events_spec ON events (spec_id);
+CREATE INDEX IF NOT EXISTS idx_events_user ON events (user);
+
+CREATE TABLE IF NOT EXISTS specs (
+    spec_id TEXT PRIMARY KEY,
+    target_contract TEXT,
+    chain_id INTEGER,
+    creator TEXT,
+    blob_hash TEXT,
+    status TEXT NOT NULL,
+    question_id TEXT,
+    is_accepted INTEGER,
+    created_block INTEGER,
+    updated_block INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_specs_contract ON specs (chain_id, target_contract);
+CREATE INDEX IF NOT EXISTS idx_specs_creator ON specs (creator);
+
+CREATE TABLE IF NOT EXISTS indexer_state (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def _decode_topic(value: str, abi_type: str) -> Any:
+    if abi_type == "address":
+        return "0x" + value[-40:].lower()
+    return value.lower()
+
+
+def _jsonable(value: Any, abi_type: str) -> Any:
+    if isinstance(value, bytes):
+        return "0x" + value.hex()
+    if abi_type == "address":
+        return value.lower()
+    if abi_type == "uint256":
+        # Keep full precision for JSON consumers
+        return str(value)
+    return value
+
+
+def decode_log(log: dict) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Decode a raw KaiSign log into (event name, args), or None for unknown events."""
+    topics = log.get("topics") or []
+    if not topics:
+        return None
+    name = EVENT_TOPICS.get(topics[0].lower())
+    if name is None:
+        return None
+    args: Dict[str, Any] = {}
+    indexed = [(arg, t) for arg, t, is_indexed in EVENTS[name] if is_indexed]
+    for (arg, abi_type), topic in zip(indexed, topics[1:]):
+        args[arg] = _decode_topic(topic, abi_type)
+    data_args = [(arg, t) for arg, t, is_indexed in EVENTS[name] if not is_indexed]
+    values = abi_decode([t for _, t in data_args], bytes.fromhex(log.get("data", "0x")[2:]))
+    for (arg, abi_type), value in zip(data_args, values):
+        args[arg] = _jsonable(value, abi_type)
+    return name, args
+
+
+class EventStore:
+    """SQLite store of decoded KaiSign events plus a per-spec summary table."""
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def get_state(self, key: str) -> Optional[int]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM indexer_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def ingest(self, logs: List[dict], to_block: int) -> int:
+        """Store decoded logs and advance the cursor to to_block in one transaction."""
+        inserted = 0
+        with self._lock, self._db:
+            for log in logs:
+                try:
+                    decoded = decode_log(log)
+                except Exception as e:
+                    print(f"Indexer failed to decode log {log.get('transactionHash')}: {e}")
+                    continue
+                if decoded is None:
+                    continue
+                name, args = decoded
+                block_number = int(log["blockNumber"], 16)
+                chain_id = args.get("chainId")
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO events (block_number, tx_hash, log_index, event, spec_id,"
+                    " target_contract, chain_id, user, args) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        block_number,
+                        log["transactionHash"].lower(),
+                        int(log["logIndex"], 16),
+                        name,
+                        args.get("specID"),
+                        args.get("targetContract"),
+                        int(chain_id) if chain_id is not None else None,
+                        next((args[a] for a in USER_ARGS if a in args), None),
+                        json.dumps(args),
+                    ),
+                )
+                if cursor.rowcount:
+                    inserted += 1
+                    self._apply_to_spec(name, args, block_number)
+            self._db.execute(
+                "INSERT OR REPLACE INTO indexer_state (key, value) VALUES ('last_block', ?)", (to_block,)
+            )
+        return inserted
+
+    def _apply_to_spec(self, name: str, args: Dict[str, Any], block_number: int) -> None:
+        spec_id = args.get("specID")
+        if spec_id is None:
+            return
+        if name in ("LogRevealSpec", "LogCreateSpec", "LogContractSpecAdded"):
+            self._db.execute(
+                "INSERT INTO specs (spec_id, target_contract, chain_id, creator, blob_hash, status,"
+                " created_block, updated_block) VALUES (?, ?, ?, ?, ?, 'Submitted', ?, ?)"
+                " ON CONFLICT(spec_id) DO UPDATE SET"
+                " target_contract = COALESCE(specs.target_contract, excluded.target_contract),"
+                " chain_id = COALESCE(specs.chain_id, excluded.chain_id),"
+                " creator = COALESCE(specs.creator, excluded.creator),"
+                " blob_hash = COALESCE(specs.blob_hash, excluded.blob_hash),"
+                " created_block = MIN(COALESCE(specs.created_block, excluded.created_block), excluded.created_block)",
+                (
+                    spec_id,
+                    args.get("targetContract"),
+                    int(args["chainId"]) if "chainId" in args else None,
+                    args.get("creator"),
+                    args.get("blobHash"),
+                    block_number,
+                    block_number,
+                ),
+            )
+        elif name == "LogProposeSpec":
+            self._upsert_status(spec_id, "Proposed", block_number, question_id=args.get("questionId"))
+        elif name == "LogHandleResult":
+            self._upsert_status(spec_id, "Finalized", block_number, is_accepted=int(bool(args.get("isAccepted"))))
+
+    def _upsert_status(self, spec_id: str, status: str, block_number: int, **fields) -> None:
+        self._db.execute(
+            "INSERT INTO specs (spec_id, status, updated_block) VALUES (?, ?, ?)"
+            " ON CONFLICT(spec_id) DO UPDATE SET status = excluded.status, updated_block = excluded.updated_block",
+            (spec_id, status, block_number),
+        )
+        for column, value in fields.items():
+            self._db.execute(f"UPDATE specs SET {column} = ? WHERE spec_id = ?", (value, spec_id))
+
+    def _query(self, sql: str, params: tuple) -> List[dict]:
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        results = []
+        for row in rows:
+            item = dict(row)
+            if "args" in item:
+                item["args"] = json.loads(item["args"])
+            results.append(item)
+        return results
+
+    def specs_for_contract(self, target_contract: str, chain_id: int) -> List[dict]:
+        return self._query(
+            "SELECT * FROM specs WHERE chain_id = ? AND target_contract = ? ORDER BY created_block",
+            (chain_id, target_contract.lower()),
+        )
+
+    def spec(self, spec_id: str) -> Optional[dict]:
+        rows = self._query("SELECT * FROM specs WHERE spec_id = ?", (spec_id.lower(),))
+        return rows[0] if rows else None
+
+    def events(
+        self,
+        spec_id: Optional[str] = None,
+        user: Optional[str] = None,
+        target_contract: Optional[str] = None,
+        chain_id: Optional[int] = None,
+        event: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> List[dict]:
+        clauses, params = [], []
+        for column, value in (
+            ("spec_id", spec_id),
+            ("user", user),
+            ("target_contract", target_contract),
+        ):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value.lower())
+        if chain_id is not None:
+            clauses.append("chain_id = ?")
+            params.append(chain_id)
+        if event:
+            clauses.append("event = ?")
+            params.append(event)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._query(
+            f"SELECT * FROM events {where} ORDER BY block_number, log_index LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        )
+
+    def counts(self) -> dict:
+        with self._lock:
+            events = self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+            specs = self._db.execute("SELECT COUNT(*) FROM specs").fetchone()[0]
+        return {"events": events, "specs": specs}
+
+
+class EventIndexer:
+    """
+    Background ingestion of KaiSign logs via ranged eth_getLogs.
+
+    The block window adapts: it halves when the provider rejects a range (too many results
+    or too wide) and doubles again after successful windows, up to max_window.
+    """
+
+    def __init__(
+        self,
+        store: EventStore,
+        rpc: RpcPool,
+        contract_address: str,
+        start_block: int,
+        window: int,
+        max_window: int,
+        confirmations: int,
+        poll_interval: float,
+    ):
+        self.store = store
+        self.rpc = rpc
+        self.contract_address = contract_address
+        self.start_block = start_block
+        self.window = window
+        self.max_window = max_window
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        self.head: Optional[int] = None
+        self.last_error: Optional[str] = None
+
+    @classmethod
+    def from_env(cls, store: EventStore, contract_address: str) -> "EventIndexer":
+        window = int(os.getenv("INDEXER_BLOCK_WINDOW", "2000"))
+        return cls(
+            store,
+            # A dedicated archive/log provider can be set apart from the shared read pool
+            rpc=RpcPool.from_env("INDEXER_RPC_URL") if os.getenv("INDEXER_RPC_URL") else read_rpc_pool,
+            contract_address=contract_address,
+            start_block=int(os.getenv("INDEXER_START_BLOCK", "0")),
+            window=window,
+            max_window=int(os.getenv("INDEXER_MAX_BLOCK_WINDOW", str(window * 5))),
+            confirmations=int(os.getenv("INDEXER_CONFIRMATIONS", "2")),
+            poll_interval=float(os.getenv("INDEXER_POLL_INTERVAL", "12")),
+        )
+
+    def read_last_block(self) -> int:
+        """Last indexed block, from the store (blocking: call from a thread)."""
+        last = self.store.get_state("last_block")
+        return last if last is not None else self.start_block - 1
+
+    async def _get_logs(self, from_block: int, to_block: int) -> List[dict]:
+        return await self.rpc.call("eth_getLogs", [{
+            "address": self.contract_address,
+            "topics": [list(EVENT_TOPICS)],
+            "fromBlock": hex(from_block),
+            "toBlock": hex(to_block),
+        }])
+
+    async def sync_once(self) -> bool:
+        """Index the next window. Returns True when caught up with the confirmed head."""
+        self.head = int(await self.rpc.call("eth_blockNumber", []), 16)
+        target = self.head - self.confirmations
+        from_block = await asyncio.to_thread(self.read_last_block) + 1
+        if from_block > target:
+            return True
+        to_block = min(from_block + self.window - 1, target)
+        try:
+            logs = await self._get_logs(from_block, to_block)
+        except RpcError as e:
+            if self.window == 1:
+                raise
+            # Most providers reject ranges with too many results (the pool hands these back
+            # without failover, see rpc_pool.is_range_error); retry with a smaller window
+            self.window = max(1, self.window // 2)
+            print(f"Indexer shrinking block window to {self.window}: {e}")
+            return False
+        await asyncio.to_thread(self.store.ingest, logs, to_block)
+        self.window = min(self.max_window, self.window * 2)
+        return to_block >= target
+
+    async def run(self) -> None:
+        if not self.rpc.configured:
+            print("Indexer disabled: no INDEXER_RPC_URL, RPC_URLS or ALCHEMY_RPC_URL configured")
+            return
+        while True:
+            try:
+                caught_up = await self.sync_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Indexer error: {e}")
+                caught_up = True
+            if caught_up:
+                await asyncio.sleep(self.poll_interval)
+
+    def status(self) -> dict:
+        return {
+            "contract_address": self.contract_address,
+            "last_block": self.read_last_block(),
+            "head": self.head,
+            "window": self.window,
+            "last_error": self.last_error,
+            **self.store.counts(),
+        }
@@ -0,0 +1,80 @@
+import asyncio
+import os
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from dotenv import load_dotenv
+
+from api.indexer import EventIndexer, EventStore
+
+load_dotenv()
+
+
+router = APIRouter(prefix="/indexer", tags=["indexer"])
+
+INDEXER_ENABLED = os.getenv("INDEXER_ENABLED", "false").lower() == "true"
+
+_indexer: Optional[EventIndexer] = None
+
+
+def init_indexer(contract_address: str) -> Optional[EventIndexer]:
+    """Create the process-wide indexer when INDEXER_ENABLED is set."""
+    global _indexer
+    if INDEXER_ENABLED and _indexer is None:
+        store = EventStore(os.getenv("INDEXER_DB_PATH", "/tmp/kaisign/events.sqlite3"))
+        _indexer = EventIndexer.from_env(store, contract_address)
+    return _indexer
+
+
+def _get_indexer() -> EventIndexer:
+    if _indexer is None:
+        raise HTTPException(status_code=503, detail="Event indexer not enabled (set INDEXER_ENABLED=true)")
+    return _indexer
+
+
+@router.get("/status")
+async def indexer_status():
+    indexer = _get_indexer()
+    return await asyncio.to_thread(indexer.status)
+
+
+@router.get("/specs")
+async def specs_for_contract(contract: str, chain_id: int):
+    """All specs indexed for a target contract, in creation order."""
+    store = _get_indexer().store
+    specs = await asyncio.to_thread(store.specs_for_contract, contract, chain_id)
+    return {"contract": contract, "chain_id": chain_id, "specs": specs}
+
+
+@router.get("/specs/{spec_id}")
+async def spec_details(spec_id: str):
+    store = _get_indexer().store
+    spec = await asyncio.to_thread(store.spec, spec_id)
+    if spec is None:
+        raise HTTPException(status_code=404, detail="Spec not indexed")
+    events = await asyncio.to_thread(store.events, spec_id=spec_id, limit=1000)
+    return {"spec": spec, "events": events}
+
+
+@router.get("/events")
+async def list_events(
+    spec_id: Optional[str] = None,
+    user: Optional[str] = None,
+    contract: Optional[str] = None,
+    chain_id: Optional[int] = None,
+    event: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    store = _get_indexer().store
+    events = await asyncio.to_thread(
+        store.events,
+        spec_id=spec_id,
+        user=user,
+        target_contract=contract,
+        chain_id=chain_id,
+        event=event,
+        limit=limit,
+        offset=offset,
+    )
+    return {"events": events, "limit": limit, "offset": offset}
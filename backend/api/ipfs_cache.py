@@ -0,0 +1,193 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import re
+import tempfile
+from typing import NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from api.lru import SizedLRU
+
+load_dotenv()
+
+
+# CIDs are base32/base58 strings; anything else is never written to disk
+CID_PATTERN = re.compile(r"^[A-Za-z0-9]{1,128}$")
+
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+SHA2_256 = 0x12
+RAW_CODEC = 0x55
+DAG_PB_CODEC = 0x70
+# Default chunk size of the UnixFS importer: larger files span several blocks
+UNIXFS_CHUNK_SIZE = 256 * 1024
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, offset
+
+
+def _base58_decode(text: str) -> bytes:
+    number = 0
+    for char in text:
+        number = number * 58 + BASE58_ALPHABET.index(char)
+    body = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    return b"\0" * (len(text) - len(text.lstrip("1"))) + body
+
+
+def _cid_codec_and_digest(cid: str) -> Tuple[int, int, bytes]:
+    """(codec, multihash code, digest) of a CIDv0 (Qm...) or base32 CIDv1 (b...)."""
+    if cid.startswith("Qm"):
+        multihash, codec = _base58_decode(cid), DAG_PB_CODEC
+    elif cid.startswith("b"):
+        text = cid[1:].upper()
+        data = base64.b32decode(text + "=" * (-len(text) % 8))
+        version, offset = _read_varint(data, 0)
+        if version != 1:
+            raise ValueError(f"Unsupported CID version {version}")
+        codec, offset = _read_varint(data, offset)
+        multihash = data[offset:]
+    else:
+        raise ValueError("Unsupported CID encoding")
+    code, offset = _read_varint(multihash, 0)
+    length, offset = _read_varint(multihash, offset)
+    return codec, code, multihash[offset:offset + length]
+
+
+def verify_cid(cid: str, content: bytes) -> Optional[bool]:
+    """
+    Whether content is what cid addresses: True or False when that can be decided locally,
+    None when it cannot (other hash functions or codecs, or files that span several blocks).
+    Checked: sha2-256 raw blocks, and single-block UnixFS files as the default importer
+    builds them (CIDv0, or CIDv1 dag-pb).
+    """
+    try:
+        codec, code, digest = _cid_codec_and_digest(cid)
+    except (ValueError, IndexError):
+        return None
+    if code != SHA2_256:
+        return None
+    if codec == RAW_CODEC:
+        return hashlib.sha256(content).digest() == digest
+    if codec != DAG_PB_CODEC or len(content) > UNIXFS_CHUNK_SIZE:
+        return None
+    # PBNode{Data: UnixFS{Type: File, Data: content, filesize}}
+    unixfs = b"\x08\x02"
+    if content:
+        unixfs += b"\x12" + _varint(len(content)) + content
+    unixfs += b"\x18" + _varint(len(content))
+    node = b"\x0a" + _varint(len(unixfs)) + unixfs
+    # Other importer settings (chunkers, trickle layout) can yield a different valid block,
+    # so a dag-pb mismatch is undecided rather than wrong
+    return True if hashlib.sha256(node).digest() == digest else None
+
+
+class IPFSDocument(NamedTuple):
+    contract_address: Optional[str]
+    chain_id: Optional[int]
+    raw: bytes
+
+
+class IPFSDocumentCache:
+    """
+    Permanent CID -> (contract_address, chain_id, raw bytes) cache.
+
+    IPFS content is immutable by CID, so entries never expire. The memory tier is an LRU
+    bounded by document size; the disk tier keeps one raw file per CID (mmap-friendly)
+    plus a small JSON sidecar with the extracted deployment. Only documents verified
+    against their CID (verify_cid) are written to disk, so an unverifiable gateway answer
+    lives at most until it is evicted or the process restarts. Disk I/O runs in a thread.
+    """
+
+    def __init__(self, max_bytes: int, directory: Optional[str]):
+        self.memory = SizedLRU(max_bytes)
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "IPFSDocumentCache":
+        return cls(
+            max_bytes=int(os.getenv("IPFS_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            directory=os.getenv("IPFS_CACHE_DIR", "/tmp/kaisign/ipfs"),
+        )
+
+    def _paths(self, cid: str):
+        return (
+            os.path.join(self.directory, f"{cid}.json"),
+            os.path.join(self.directory, f"{cid}.meta"),
+        )
+
+    def _disk_get(self, cid: str) -> Optional[IPFSDocument]:
+        raw_path, meta_path = self._paths(cid)
+        try:
+            with open(meta_path, "rb") as f:
+                meta = json.load(f)
+            with open(raw_path, "rb") as f:
+                raw = f.read()
+        except (OSError, ValueError):
+            return None
+        return IPFSDocument(meta.get("contract_address"), meta.get("chain_id"), raw)
+
+    async def get(self, cid: str) -> Optional[IPFSDocument]:
+        document = self.memory.get(cid)
+        if document is not None or not self.directory or not CID_PATTERN.match(cid):
+            return document
+        document = await asyncio.to_thread(self._disk_get, cid)
+        if document is not None:
+            self.memory.set(cid, document, len(document.raw))
+        return document
+
+    def _write(self, path: str, data: bytes) -> None:
+        # Write to a temp file and rename so readers never see a partial document
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def _disk_set(self, cid: str, document: IPFSDocument) -> None:
+        raw_path, meta_path = self._paths(cid)
+        try:
+            # The sidecar is written last: its presence marks a complete entry
+            self._write(raw_path, document.raw)
+            self._write(meta_path, json.dumps({
+                "contract_address": document.contract_address,
+                "chain_id": document.chain_id,
+            }).encode())
+        except OSError as e:
+            print(f"Failed to persist IPFS document {cid}: {e}")
+
+    async def set(self, cid: str, document: IPFSDocument) -> None:
+        self.memory.set(cid, document, len(document.raw))
+        if not self.directory or not CID_PATTERN.match(cid) or not verify_cid(cid, document.raw):
+            return
+        await asyncio.to_thread(self._disk_set, cid, document)
+
+
+ipfs_document_cache = IPFSDocumentCache.from_env()
@@ -0,0 +1,155 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, List, Optional
+
+from dotenv import load_dotenv
+
+from api.http_client import http_request
+
+load_dotenv()
+
+
+DEFAULT_GATEWAYS = [
+    "https://ipfs.io/ipfs/",
+    "https://gateway.pinata.cloud/ipfs/",
+    "https://cloudflare-ipfs.com/ipfs/",
+]
+
+
+class GatewayStats:
+    """Rolling health figures for one IPFS gateway."""
+
+    def __init__(self, base_url: str, initial_latency: float):
+        self.base_url = base_url
+        self.ewma_latency = initial_latency
+        self.error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def score(self) -> float:
+        # Lower is better: expected latency, inflated by the recent error rate
+        return self.ewma_latency * (1 + 4 * self.error_rate)
+
+    def as_dict(self) -> dict:
+        return {
+            "gateway": self.base_url,
+            "ewma_latency_ms": round(self.ewma_latency * 1000, 1),
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+class GatewaySelector:
+    """
+    Latency-ranked, hedged fetching across IPFS gateways.
+
+    Gateways are tried in order of score. If the current attempt has not answered within the
+    hedge delay (configured, or the observed p90 latency), the next gateway is raced against it;
+    a failure starts the next gateway immediately. The first success wins and the rest are cancelled.
+    """
+
+    def __init__(
+        self,
+        gateways: List[str],
+        timeout: float,
+        hedge_delay: Optional[float],
+        alpha: float,
+    ):
+        self.timeout = timeout
+        self.fixed_hedge_delay = hedge_delay
+        self.alpha = alpha
+        # Unknown gateways start at the configured hedge delay (or 1s) so they keep their order
+        initial_latency = hedge_delay if hedge_delay is not None else 1.0
+        self.gateways = [GatewayStats(url, initial_latency) for url in gateways]
+        self._latencies: Deque[float] = deque(maxlen=200)
+
+    @classmethod
+    def from_env(cls) -> "GatewaySelector":
+        gateways = [g.strip() for g in os.getenv("IPFS_GATEWAYS", "").split(",") if g.strip()]
+        hedge_delay = os.getenv("IPFS_HEDGE_DELAY")
+        return cls(
+            gateways=[g if g.endswith("/") else g + "/" for g in gateways] or DEFAULT_GATEWAYS,
+            timeout=float(os.getenv("IPFS_GATEWAY_TIMEOUT", "10")),
+            hedge_delay=float(hedge_delay) if hedge_delay else None,
+            alpha=float(os.getenv("IPFS_GATEWAY_EWMA_ALPHA", "0.2")),
+        )
+
+    def ranked(self) -> List[GatewayStats]:
+        return sorted(self.gateways, key=lambda g: g.score())
+
+    def hedge_delay(self) -> float:
+        if self.fixed_hedge_delay is not None:
+            return self.fixed_hedge_delay
+        if len(self._latencies) < 10:
+            return 1.0
+        ordered = sorted(self._latencies)
+        return max(0.05, ordered[int(len(ordered) * 0.9) - 1])
+
+    def _record(self, gateway: GatewayStats, latency: float, error: Optional[Exception]) -> None:
+        gateway.requests += 1
+        gateway.error_rate += self.alpha * ((1.0 if error else 0.0) - gateway.error_rate)
+        if error:
+            gateway.failures += 1
+            gateway.last_error = str(error)
+            # A failure costs at least as much as the time it took
+            latency = max(latency, gateway.ewma_latency)
+        else:
+            self._latencies.append(latency)
+        gateway.ewma_latency += self.alpha * (latency - gateway.ewma_latency)
+
+    async def _attempt(self, gateway: GatewayStats, cid: str, parse: Callable[[bytes], Any]) -> Any:
+        started = time.monotonic()
+        try:
+            response = await http_request("GET", gateway.base_url + cid, timeout=self.timeout)
+            response.raise_for_status()
+            result = parse(response.content)
+        except asyncio.CancelledError:
+            # Lost a hedged race: the elapsed time is a lower bound on this gateway's latency
+            elapsed = time.monotonic() - started
+            if elapsed > gateway.ewma_latency:
+                gateway.ewma_latency += self.alpha * (elapsed - gateway.ewma_latency)
+            raise
+        except Exception as e:
+            self._record(gateway, time.monotonic() - started, e)
+            print(f"Failed to fetch from {gateway.base_url}{cid}: {e}")
+            raise
+        self._record(gateway, time.monotonic() - started, None)
+        return result
+
+    async def fetch(self, cid: str, parse: Callable[[bytes], Any] = bytes) -> Any:
+        """
+        Fetch cid and return parse(body). A body that fails to parse counts as a gateway failure.
+        """
+        queue = self.ranked()
+        pending = set()
+        try:
+            while queue or pending:
+                if queue:
+                    gateway = queue.pop(0)
+                    pending.add(asyncio.create_task(self._attempt(gateway, cid, parse)))
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_delay() if queue else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise Exception("Failed to fetch from all IPFS gateways")
+
+    def health(self) -> dict:
+        return {
+            "hedge_delay_ms": round(self.hedge_delay() * 1000, 1),
+            "gateways": [g.as_dict() for g in self.ranked()],
+        }
+
+
+gateway_selector = GatewaySelector.from_env()
@@ -1,6 +1,7 @@
 import os
 import binascii
-from typing import Tuple, Optional
+import threading
+from typing import Dict, Tuple, Optional
 
 from dotenv import load_dotenv
 
@@ -14,7 +15,14 @@ from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
 
 from eth_utils import keccak, to_checksum_address
 from eth_keys.datatypes import Signature
-from eth_keys.backends.native.ecdsa import ecdsa_raw_recover
+from eth_keys.backends.native.jacobian import fast_add, fast_multiply
+from eth_keys.constants import SECPK1_G
+
+# Optional libsecp256k1 bindings; recovery falls back to pure Python without them
+try:
+    from coincurve import PublicKey as CoincurvePublicKey
+except ImportError:
+    CoincurvePublicKey = None
 
 
 load_dotenv()
@@ -25,10 +33,45 @@ SECP256K1_N = int(
 )
 
 
+def compute_recovery_id(digest: bytes, r: int, s: int, pubkey_bytes: bytes) -> Optional[int]:
+    """
+    Returns the recovery id (0/1) of signature (r, s) over digest for the 64-byte X||Y public key,
+    or None if the signature does not match the key.
+    """
+    if CoincurvePublicKey is not None:
+        # libsecp256k1 recovery is cheap enough to simply try both ids
+        signature = r.to_bytes(32, "big") + s.to_bytes(32, "big")
+        for rec_id in (0, 1):
+            try:
+                recovered = CoincurvePublicKey.from_signature_and_message(
+                    signature + bytes([rec_id]), digest, hasher=None
+                )
+            except Exception:
+                continue
+            if recovered.format(compressed=False)[1:] == pubkey_bytes:
+                return rec_id
+        return None
+
+    # Without libsecp256k1, rebuild the nonce point R = (z/s)*G + (r/s)*Q directly:
+    # its y parity is the recovery id, and this costs a single verification instead of
+    # up to two pure-Python public key recoveries.
+    pubkey_x = int.from_bytes(pubkey_bytes[:32], "big")
+    pubkey_y = int.from_bytes(pubkey_bytes[32:], "big")
+    z = int.from_bytes(digest, "big")
+    s_inv = pow(s, -1, SECP256K1_N)
+    rx, ry = fast_add(
+        fast_multiply(SECPK1_G, z * s_inv % SECP256K1_N),
+        fast_multiply((pubkey_x, pubkey_y), r * s_inv % SECP256K1_N),
+    )
+    if rx != r:
+        return None
+    return ry & 1
+
+
 class KmsEthereumSigner:
     """Helper for using AWS KMS secp256k1 keys to sign Ethereum digests."""
 
-    def __init__(self, key_id: str, region: Optional[str] = None):
+    def __init__(self, key_id: str, region: Optional[str] = None, endpoint_url: Optional[str] = None):
         if not key_id:
             raise ValueError("KMS key id is required")
         region_name = region or os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION")
@@ -38,28 +81,41 @@ class KmsEthereumSigner:
         self.client = boto3.client(
             "kms",
             region_name=region_name,
+            # Optional override, e.g. a local KMS stand-in for tests
+            endpoint_url=endpoint_url or os.getenv("AWS_KMS_ENDPOINT_URL") or None,
             config=BotoConfig(retries={"max_attempts": 5, "mode": "standard"}),
         )
+        # The public key of a KMS key never changes, so it is fetched at most once
+        self._uncompressed_pubkey: Optional[bytes] = None
+        self._eth_address: Optional[str] = None
+        self._pubkey_lock = threading.Lock()
 
     def _get_uncompressed_pubkey(self) -> bytes:
         """
         Returns uncompressed public key bytes (0x04 || X || Y) from KMS.
         """
-        resp = self.client.get_public_key(KeyId=self.key_id)
-        der_bytes = resp["PublicKey"]
-        pub = load_der_public_key(der_bytes)
-        if not isinstance(pub, ec.EllipticCurvePublicKey):
-            raise ValueError("KMS public key is not EC")
-        numbers = pub.public_numbers()
-        x = numbers.x.to_bytes(32, byteorder="big")
-        y = numbers.y.to_bytes(32, byteorder="big")
-        return b"\x04" + x + y
+        if self._uncompressed_pubkey is not None:
+            return self._uncompressed_pubkey
+        with self._pubkey_lock:
+            if self._uncompressed_pubkey is None:
+                resp = self.client.get_public_key(KeyId=self.key_id)
+                der_bytes = resp["PublicKey"]
+                pub = load_der_public_key(der_bytes)
+                if not isinstance(pub, ec.EllipticCurvePublicKey):
+                    raise ValueError("KMS public key is not EC")
+                numbers = pub.public_numbers()
+                x = numbers.x.to_bytes(32, byteorder="big")
+                y = numbers.y.to_bytes(32, byteorder="big")
+                self._uncompressed_pubkey = b"\x04" + x + y
+        return self._uncompressed_pubkey
 
     def get_eth_address(self) -> str:
-        uncompressed = self._get_uncompressed_pubkey()
-        # Ethereum address = last 20 bytes of keccak(uncompressed[1:])
-        addr_bytes = keccak(uncompressed[1:])[-20:]
-        return to_checksum_address("0x" + addr_bytes.hex())
+        if self._eth_address is None:
+            uncompressed = self._get_uncompressed_pubkey()
+            # Ethereum address = last 20 bytes of keccak(uncompressed[1:])
+            addr_bytes = keccak(uncompressed[1:])[-20:]
+            self._eth_address = to_checksum_address("0x" + addr_bytes.hex())
+        return self._eth_address
 
     @staticmethod
     def _ensure_low_s(r: int, s: int) -> Tuple[int, int, bool]:
@@ -100,22 +156,12 @@ class KmsEthereumSigner:
         r, s = decode_dss_signature(der_sig)
         r, s, flipped = self._ensure_low_s(r, s)
 
-        # Determine recovery id by trial recovery against the KMS public key
+        # Determine recovery id against the (memoized) KMS public key
         uncompressed = self._get_uncompressed_pubkey()
         pubkey_bytes = uncompressed[1:]  # 64 bytes X||Y
-        pubkey_x = int.from_bytes(pubkey_bytes[:32], "big")
         pubkey_y = int.from_bytes(pubkey_bytes[32:], "big")
 
-        # Try both recovery ids
-        rec_id_found: Optional[int] = None
-        for rec_id in (0, 1):
-            try:
-                recovered = ecdsa_raw_recover(digest, (r, s, rec_id))
-                if recovered.point.x == pubkey_x and recovered.point.y == pubkey_y:
-                    rec_id_found = rec_id
-                    break
-            except Exception:
-                continue
+        rec_id_found = compute_recovery_id(digest, r, s, pubkey_bytes)
         if rec_id_found is None:
             # Fallback heuristic: use parity from Y coordinate
             rec_id_found = pubkey_y & 1
@@ -125,3 +171,20 @@ class KmsEthereumSigner:
         return r, s, v, y_parity
 
 
+_signers: Dict[Tuple[str, str], KmsEthereumSigner] = {}
+_signers_lock = threading.Lock()
+
+
+def get_signer(key_id: str, region: str) -> KmsEthereumSigner:
+    """
+    Process-wide signer registry keyed by (key_id, region).
+    Reusing the signer keeps its boto3 client and memoized public key across requests.
+    """
+    key = (key_id, region)
+    signer = _signers.get(key)
+    if signer is None:
+        with _signers_lock:
+            signer = _signers.get(key)
+            if signer is None:
+                signer = _signers[key] = KmsEthereumSigner(key_id=key_id, region=region)
+    return signer
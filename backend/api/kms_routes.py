@@ -1,21 +1,42 @@
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
 from api.security import enforce_api_key
-from api.kms import KmsEthereumSigner
+from api.kms import KmsEthereumSigner, get_signer
+from api.ratelimit import TokenBucket
 
 load_dotenv()
 
 
 router = APIRouter(prefix="/kms", tags=["kms"], dependencies=[Depends(enforce_api_key)])
 
+KMS_MAX_BATCH = int(os.getenv("KMS_MAX_BATCH", "32"))
+# Dedicated, sized executor for blocking boto3 KMS calls, so KMS latency
+# cannot exhaust Starlette's shared threadpool
+_kms_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("KMS_MAX_WORKERS", "8")), thread_name_prefix="kms"
+)
+# Keeps signing under the account's KMS Sign request quota
+_kms_sign_bucket = TokenBucket(
+    rate=float(os.getenv("KMS_SIGN_RATE", "50")),
+    capacity=float(os.getenv("KMS_SIGN_BURST", "10")),
+)
+
 
 class SignDigestRequest(BaseModel):
     digest: str  # 0x + 64 hex chars
 
 
+class SignDigestsRequest(BaseModel):
+    digests: List[str]  # each 0x + 64 hex chars
+
+
 def _get_signer() -> KmsEthereumSigner:
     key_id = os.getenv("AWS_KMS_KEY_ID")
     region = os.getenv("AWS_REGION") or os.getenv("AWS_DEFAULT_REGION")
@@ -23,19 +44,10 @@ def _get_signer() -> KmsEthereumSigner:
         raise HTTPException(status_code=503, detail="AWS_KMS_KEY_ID not configured")
     if not region:
         raise HTTPException(status_code=503, detail="AWS_REGION not configured")
-    return KmsEthereumSigner(key_id=key_id, region=region)
-
-
-@router.get("/address")
-def get_address():
-    signer = _get_signer()
-    return {"address": signer.get_eth_address()}
+    return get_signer(key_id=key_id, region=region)
 
 
-@router.post("/signDigest")
-def sign_digest(req: SignDigestRequest):
-    signer = _get_signer()
-    r, s, v, y_parity = signer.sign_digest(req.digest)
+def _signature_response(r: int, s: int, v: int, y_parity: int) -> dict:
     return {
         "r": f"0x{r:064x}",
         "s": f"0x{s:064x}",
@@ -44,3 +56,40 @@ def sign_digest(req: SignDigestRequest):
     }
 
 
+async def _run_kms(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_kms_executor, fn, *args)
+
+
+@router.get("/address")
+async def get_address():
+    signer = _get_signer()
+    return {"address": await _run_kms(signer.get_eth_address)}
+
+
+@router.post("/signDigest")
+async def sign_digest(req: SignDigestRequest):
+    signer = _get_signer()
+    await _kms_sign_bucket.acquire()
+    r, s, v, y_parity = await _run_kms(signer.sign_digest, req.digest)
+    return _signature_response(r, s, v, y_parity)
+
+
+@router.post("/signDigests")
+async def sign_digests(req: SignDigestsRequest):
+    """
+    Sign several digests concurrently. Results come back in request order;
+    a digest that fails yields {"error": ...} without affecting the others.
+    """
+    if len(req.digests) > KMS_MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {KMS_MAX_BATCH} digests per request")
+    signer = _get_signer()
+
+    async def sign_one(digest: str) -> dict:
+        try:
+            await _kms_sign_bucket.acquire()
+            r, s, v, y_parity = await _run_kms(signer.sign_digest, digest)
+            return _signature_response(r, s, v, y_parity)
+        except Exception as e:
+            return {"error": str(e)}
+
+    return {"results": await asyncio.gather(*(sign_one(digest) for digest in req.digests))}
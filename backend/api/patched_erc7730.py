@@ -4,6 +4,7 @@ Import this module before using any ERC7730 functions.
 """
 
 import json
+import orjson
 from typing import Any, Dict, List, Optional, Union
 import importlib.util
 import sys
@@ -88,6 +89,26 @@ def patched_generate_descriptor(*args, **kwargs):
     
     return result
 
+def serialize_descriptor(result: Any) -> bytes:
+    """
+    Encode a generated descriptor straight to the JSON bytes served to clients.
+
+    Pydantic models are dumped once by pydantic-core; this matches the output of the old
+    result.json() -> json.loads -> JSONResponse round-trip without the intermediate dict.
+    """
+    if hasattr(result, "model_dump_json"):
+        try:
+            return result.model_dump_json(by_alias=False).encode("utf-8")
+        except Exception:
+            pass
+    if not isinstance(result, (dict, list)):
+        result = make_serializable(result)
+    return orjson.dumps(result, default=str)
+
+def generate_descriptor_json(*args, **kwargs) -> bytes:
+    """Generate a descriptor and return it already serialized (see serialize_descriptor)."""
+    return serialize_descriptor(original_generate_descriptor(*args, **kwargs))
+
 # Apply the monkey patch
 generate.generate_descriptor = patched_generate_descriptor
 
@@ -1,10 +1,12 @@
-import os
-import requests
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
 from api.security import enforce_api_key
+from api.rpc import RpcError
+from api.tx_relay import tx_relay
 
 load_dotenv()
 
@@ -17,32 +19,32 @@ class RawTx(BaseModel):
 
 
 @router.post("/sendRawTransaction")
-def send_raw_transaction(payload: RawTx):
-    rpc_url = os.getenv("SEPOLIA_RPC_URL") or os.getenv("ALCHEMY_RPC_URL")
-    if not rpc_url:
+async def send_raw_transaction(payload: RawTx):
+    if not tx_relay.rpc.configured:
         raise HTTPException(status_code=503, detail="RPC URL not configured")
     if not payload.raw or not payload.raw.startswith("0x"):
         raise HTTPException(status_code=400, detail="raw must be 0x-prefixed hex string")
 
     try:
-        resp = requests.post(
-            rpc_url,
-            json={
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "eth_sendRawTransaction",
-                "params": [payload.raw],
-            },
-            timeout=30,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        if "error" in data:
-            raise HTTPException(status_code=502, detail=data["error"]) 
-        return data
-    except HTTPException:
-        raise
+        tx_hash = await tx_relay.submit(payload.raw)
+        return {"jsonrpc": "2.0", "id": 1, "result": tx_hash}
+    except RpcError as e:
+        raise HTTPException(status_code=502, detail=e.error or str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out waiting for the node to accept the transaction")
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
 
+@router.get("/txStatus/{tx_hash}")
+async def tx_status(tx_hash: str):
+    """Status of a transaction sent through this relay: pending, confirmed, failed or dropped."""
+    status = tx_relay.status(tx_hash)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Transaction not tracked by this relay")
+    return status
+
+
+@router.get("/relayStatus")
+async def relay_status():
+    return tx_relay.stats()
@@ -0,0 +1,62 @@
+from typing import Any, List, Sequence, Tuple, Union
+
+from api.http_client import http_request
+
+
+class RpcError(Exception):
+    """Error returned by a JSON-RPC endpoint for a single call."""
+
+    def __init__(self, message: str, error: Any = None):
+        super().__init__(message)
+        # The raw JSON-RPC error object, when the endpoint returned one
+        self.error = error
+
+
+async def rpc_call(url: str, method: str, params: list, timeout: float = 30) -> Any:
+    """Send a single JSON-RPC call and return its result."""
+    response = await http_request(
+        "POST",
+        url,
+        json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params},
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    data = response.json()
+    if "error" in data:
+        raise RpcError(f"RPC error: {data['error']}", data["error"])
+    return data["result"]
+
+
+async def rpc_batch(
+    url: str, calls: Sequence[Tuple[str, list]], timeout: float = 30
+) -> List[Union[Any, RpcError]]:
+    """
+    Send several JSON-RPC calls as one batch array.
+    Returns one entry per call, in order: the call's result, or an RpcError for that item.
+    Transport failures raise for the whole batch.
+    """
+    if not calls:
+        return []
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    response = await http_request("POST", url, json=payload, timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+    if not isinstance(data, list):
+        # Some providers answer a rejected batch with a single error object
+        raise RpcError(f"RPC error: {data.get('error', data) if isinstance(data, dict) else data}")
+
+    # Batch responses may come back in any order
+    by_id = {item.get("id"): item for item in data if isinstance(item, dict)}
+    results: List[Union[Any, RpcError]] = []
+    for i in range(len(calls)):
+        item = by_id.get(i)
+        if item is None:
+            results.append(RpcError("RPC error: missing response in batch"))
+        elif "error" in item:
+            results.append(RpcError(f"RPC error: {item['error']}", item["error"]))
+        else:
+            results.append(item.get("result"))
+    return results
@@ -0,0 +1,216 @@
+import asyncio
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple, Union
+
+import httpx
+from dotenv import load_dotenv
+
+from api.ratelimit import TokenBucket
+from api.rpc import RpcError, rpc_batch, rpc_call
+
+load_dotenv()
+
+
+# JSON-RPC error codes providers use for rate limiting (Infura/Alchemy -32005, some proxies 429)
+RATE_LIMIT_ERROR_CODES = {-32005, -32029, 429}
+# Infura also answers -32005 for eth_getLogs ranges with too many results; those are the
+# caller's to handle (the indexer shrinks its window), not a reason to cool an endpoint down
+RANGE_ERROR_HINTS = ("query returned more than", "block range", "range is too large", "too many results", "response size")
+
+
+class RpcEndpoint:
+    """One JSON-RPC provider with its own rate limit and rolling health figures."""
+
+    def __init__(self, url: str, rate: float, burst: float):
+        self.url = url
+        self.bucket = TokenBucket(rate=rate, capacity=burst)
+        self.ewma_latency = 0.2
+        self.error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.last_error: Optional[str] = None
+
+    def available(self) -> bool:
+        return time.monotonic() >= self.cooldown_until
+
+    def score(self) -> float:
+        # Lower is better: expected latency, inflated by the recent error rate
+        return self.ewma_latency * (1 + 4 * self.error_rate)
+
+    def as_dict(self) -> dict:
+        # Query strings and paths often carry provider API keys; only report the host
+        return {
+            "endpoint": httpx.URL(self.url).host,
+            "available": self.available(),
+            "ewma_latency_ms": round(self.ewma_latency * 1000, 1),
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "cooldown_s": round(max(0.0, self.cooldown_until - time.monotonic()), 1),
+            "last_error": self.last_error,
+        }
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429
+    if isinstance(error, RpcError) and isinstance(error.error, dict):
+        return error.error.get("code") in RATE_LIMIT_ERROR_CODES and not is_range_error(error)
+    return False
+
+
+def is_range_error(error: Exception) -> bool:
+    """eth_getLogs rejected because the block range or result set is too large."""
+    if not isinstance(error, RpcError):
+        return False
+    message = str(error.error.get("message", "") if isinstance(error.error, dict) else error).lower()
+    return any(hint in message for hint in RANGE_ERROR_HINTS)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Transport failures, 429/5xx responses and provider rate-limit errors are worth another endpoint."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError) or _is_rate_limited(error)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    if isinstance(error, httpx.HTTPStatusError):
+        try:
+            return float(error.response.headers.get("Retry-After", ""))
+        except ValueError:
+            return None
+    return None
+
+
+class RpcPool:
+    """
+    Pool of interchangeable JSON-RPC endpoints.
+
+    Each request goes to the healthiest available endpoint (EWMA latency inflated by error
+    rate), after waiting on that endpoint's token bucket. Retryable failures (transport
+    errors, 429/5xx, provider rate-limit errors) fail over to the next untried endpoint right
+    away; once every endpoint has been tried, retries wait a jittered exponential backoff.
+    Rate-limited or repeatedly failing endpoints are cooled down and skipped meanwhile.
+    JSON-RPC errors such as a reverted call are returned to the caller unchanged. A request
+    that timed out or got a 5xx may still have been delivered, so callers sending
+    non-idempotent requests must expect the resend's error (see tx_relay._settle_resent).
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        rate: float,
+        burst: float,
+        max_attempts: int,
+        backoff_base: float,
+        backoff_max: float,
+        alpha: float = 0.2,
+    ):
+        self.endpoints: List[RpcEndpoint] = []
+        for entry in urls:
+            # "url|rate" overrides the default per-endpoint rate limit
+            url, _, endpoint_rate = entry.partition("|")
+            self.endpoints.append(RpcEndpoint(url, float(endpoint_rate or rate), burst))
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.alpha = alpha
+
+    @classmethod
+    def from_env(cls, var: str, *fallbacks: str) -> "RpcPool":
+        """
+        Endpoints from the comma-separated `var`, else the first fallback variable that is set.
+        Fallbacks are never pooled together: they may point at different networks.
+        """
+        urls = [u.strip() for u in os.getenv(var, "").split(",") if u.strip()]
+        if not urls:
+            urls = [os.getenv(name) for name in fallbacks if os.getenv(name)][:1]
+        return cls(
+            urls,
+            rate=float(os.getenv("RPC_RATE_LIMIT", "25")),
+            burst=float(os.getenv("RPC_RATE_BURST", "10")),
+            max_attempts=int(os.getenv("RPC_MAX_ATTEMPTS", "4")),
+            backoff_base=float(os.getenv("RPC_BACKOFF_BASE", "0.25")),
+            backoff_max=float(os.getenv("RPC_BACKOFF_MAX", "8")),
+        )
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.endpoints)
+
+    def ranked(self) -> List[RpcEndpoint]:
+        # Cooled-down endpoints are kept at the back as a last resort
+        return sorted(self.endpoints, key=lambda e: (not e.available(), e.score()))
+
+    def _record(self, endpoint: RpcEndpoint, latency: float, error: Optional[Exception]) -> None:
+        endpoint.requests += 1
+        endpoint.error_rate += self.alpha * ((1.0 if error else 0.0) - endpoint.error_rate)
+        if error is None:
+            endpoint.consecutive_failures = 0
+            endpoint.ewma_latency += self.alpha * (latency - endpoint.ewma_latency)
+            return
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        endpoint.last_error = str(error)
+        endpoint.ewma_latency += self.alpha * (max(latency, endpoint.ewma_latency) - endpoint.ewma_latency)
+        cooldown = _retry_after(error)
+        if cooldown is None and (_is_rate_limited(error) or endpoint.consecutive_failures >= 3):
+            cooldown = min(self.backoff_max * 4, self.backoff_base * 2 ** endpoint.consecutive_failures)
+        if cooldown:
+            endpoint.cooldown_until = time.monotonic() + cooldown
+
+    async def _execute(self, send: Callable[[str], Awaitable[Any]]) -> Any:
+        if not self.endpoints:
+            raise RpcError("No RPC endpoint configured")
+        tried = set()
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_attempts):
+            ranked = self.ranked()
+            endpoint = next((e for e in ranked if e.url not in tried), None)
+            if endpoint is None:
+                # Every endpoint failed this request already: back off before cycling again
+                tried.clear()
+                endpoint = ranked[0]
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                # Honour a Retry-After cooldown when even the best endpoint is cooling down
+                cooldown = endpoint.cooldown_until - time.monotonic()
+                await asyncio.sleep(min(self.backoff_max, max(delay, cooldown)))
+            tried.add(endpoint.url)
+            await endpoint.bucket.acquire()
+            started = time.monotonic()
+            try:
+                result = await send(endpoint.url)
+            except Exception as e:
+                if not is_retryable(e):
+                    # The endpoint answered; the request itself was rejected
+                    self._record(endpoint, time.monotonic() - started, None)
+                    raise
+                self._record(endpoint, time.monotonic() - started, e)
+                print(f"RPC request to {httpx.URL(endpoint.url).host} failed: {e}")
+                last_error = e
+                continue
+            self._record(endpoint, time.monotonic() - started, None)
+            return result
+        raise last_error
+
+    async def call(self, method: str, params: list, timeout: float = 30) -> Any:
+        return await self._execute(lambda url: rpc_call(url, method, params, timeout=timeout))
+
+    async def batch(
+        self, calls: Sequence[Tuple[str, list]], timeout: float = 30
+    ) -> List[Union[Any, RpcError]]:
+        return await self._execute(lambda url: rpc_batch(url, calls, timeout=timeout))
+
+    def health(self) -> dict:
+        return {"endpoints": [e.as_dict() for e in self.ranked()]}
+
+
+# Contract reads (spec lookups, reveal watcher)
+read_rpc_pool = RpcPool.from_env("RPC_URLS", "ALCHEMY_RPC_URL")
+# Relay writes and receipt polling; SEPOLIA_RPC_URL, else ALCHEMY_RPC_URL, as before
+write_rpc_pool = RpcPool.from_env("RELAY_RPC_URLS", "SEPOLIA_RPC_URL", "ALCHEMY_RPC_URL")
@@ -0,0 +1,156 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from eth_utils import keccak
+
+from api.rpc_pool import RpcPool
+
+load_dotenv()
+
+
+LOG_REVEAL_SPEC_TOPIC = "0x" + keccak(
+    text="LogRevealSpec(address,bytes32,bytes32,bytes32,address,uint256)"
+).hex()
+
+
+class SpecHashCache:
+    """
+    specID -> IPFS hash lookups.
+
+    A revealed spec's IPFS pointer never changes, so positive entries are permanent.
+    Negative entries (nothing stored yet) expire after negative_ttl seconds, or earlier
+    when a newer block or a LogRevealSpec event for that specID is observed.
+    """
+
+    def __init__(self, negative_ttl: float):
+        self.negative_ttl = negative_ttl
+        self.latest_block = 0
+        self._positives: Dict[str, str] = {}
+        self._negatives: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, spec_id: str) -> Tuple[bool, Optional[str]]:
+        """Returns (hit, ipfs_hash); a hit with ipfs_hash None is a cached negative."""
+        key = spec_id.lower()
+        with self._lock:
+            ipfs_hash = self._positives.get(key)
+            if ipfs_hash is not None:
+                return True, ipfs_hash
+            expires_at = self._negatives.get(key)
+            if expires_at is None:
+                return False, None
+            if time.monotonic() >= expires_at:
+                del self._negatives[key]
+                return False, None
+            return True, None
+
+    def set(self, spec_id: str, ipfs_hash: Optional[str]) -> None:
+        key = spec_id.lower()
+        with self._lock:
+            if ipfs_hash:
+                self._positives[key] = ipfs_hash
+                self._negatives.pop(key, None)
+            elif self.negative_ttl > 0:
+                self._negatives[key] = time.monotonic() + self.negative_ttl
+
+    def mark_revealed(self, spec_ids: Iterable[str]) -> None:
+        with self._lock:
+            for spec_id in spec_ids:
+                self._negatives.pop(spec_id.lower(), None)
+
+    def clear_negatives(self) -> None:
+        with self._lock:
+            self._negatives.clear()
+
+    def stats(self) -> dict:
+        return {
+            "positive": len(self._positives),
+            "negative": len(self._negatives),
+            "latest_block": self.latest_block,
+        }
+
+
+class RevealWatcher:
+    """
+    Follows new blocks to invalidate negative cache entries.
+    Each new block range is scanned for LogRevealSpec; only the revealed specIDs are dropped,
+    or every negative entry when the scan is not possible. Optionally replays recent reveals
+    at startup and passes their specIDs to warm() so their hashes are cached up front.
+    """
+
+    def __init__(
+        self,
+        cache: SpecHashCache,
+        rpc: RpcPool,
+        contract_address: str,
+        poll_interval: float,
+        warmup_blocks: int,
+        max_log_range: int,
+        warm: Optional[Callable[[List[str]], Awaitable[object]]] = None,
+    ):
+        self.cache = cache
+        self.rpc = rpc
+        self.contract_address = contract_address
+        self.poll_interval = poll_interval
+        self.warmup_blocks = warmup_blocks
+        self.max_log_range = max_log_range
+        self.warm = warm
+
+    async def _block_number(self) -> int:
+        return int(await self.rpc.call("eth_blockNumber", []), 16)
+
+    async def _revealed_spec_ids(self, from_block: int, to_block: int) -> List[str]:
+        spec_ids: List[str] = []
+        for start in range(from_block, to_block + 1, self.max_log_range):
+            end = min(start + self.max_log_range - 1, to_block)
+            logs = await self.rpc.call("eth_getLogs", [{
+                "address": self.contract_address,
+                "topics": [LOG_REVEAL_SPEC_TOPIC],
+                "fromBlock": hex(start),
+                "toBlock": hex(end),
+            }])
+            spec_ids.extend(log["topics"][2] for log in logs if len(log.get("topics", [])) > 2)
+        return spec_ids
+
+    async def warm_up(self) -> None:
+        head = await self._block_number()
+        spec_ids = await self._revealed_spec_ids(max(0, head - self.warmup_blocks), head)
+        if spec_ids and self.warm is not None:
+            await self.warm(spec_ids)
+        self.cache.latest_block = head
+        print(f"Spec cache warm-up replayed {len(spec_ids)} LogRevealSpec events")
+
+    async def poll(self) -> None:
+        head = await self._block_number()
+        last = self.cache.latest_block
+        if head <= last:
+            return
+        if last and head - last <= self.max_log_range:
+            self.cache.mark_revealed(await self._revealed_spec_ids(last + 1, head))
+        else:
+            self.cache.clear_negatives()
+        self.cache.latest_block = head
+
+    async def run(self) -> None:
+        if not self.rpc.configured or self.poll_interval <= 0:
+            return
+        if self.warmup_blocks > 0:
+            try:
+                await self.warm_up()
+            except Exception as e:
+                print(f"Spec cache warm-up failed: {e}")
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+            except Exception as e:
+                # Without a successful scan we cannot tell what was revealed
+                self.cache.clear_negatives()
+                print(f"Spec cache block poll failed: {e}")
+
+
+spec_hash_cache = SpecHashCache(negative_ttl=float(os.getenv("SPEC_CACHE_NEGATIVE_TTL", "30")))
@@ -0,0 +1,84 @@
+import mmap
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+
+import numpy as np
+import pytest
+
+from api.blob_codec import BLOB_CAPACITY, BLOB_SIZE, decode, decode_blobs, encode_blob, encode_blobs
+
+LAMBDA_PATH = os.path.join(os.path.dirname(__file__), "..", "lambda", "kms-blob-lambda.js")
+
+
+def payload(size: int) -> bytes:
+    # Never ends in a zero byte, like the JSON specs stored in blobs
+    return ((np.arange(size) % 255) + 1).astype(np.uint8).tobytes()
+
+
+def to_blobs_loop(data: bytes) -> bytes:
+    """Line-by-line port of toBlobs in lambda/kms-blob-lambda.js."""
+    blob = bytearray(BLOB_SIZE)
+    for i, byte in enumerate(data[:BLOB_CAPACITY]):
+        field_index, byte_index = divmod(i, 31)
+        blob[field_index * 32 + byte_index + 1] = byte
+    return bytes(blob)
+
+
+def test_empty_payload():
+    blobs = encode_blobs(b"")
+    assert blobs == [bytes(BLOB_SIZE)]
+    assert decode(blobs[0]) == b""
+    assert decode_blobs(blobs) == b""
+
+
+def test_payload_filling_one_blob():
+    data = payload(BLOB_CAPACITY)
+    blobs = encode_blobs(data)
+    assert len(blobs) == 1
+    assert blobs[0] == to_blobs_loop(data)
+    assert decode(blobs[0]) == data
+
+
+def test_payload_spilling_into_second_blob():
+    data = payload(BLOB_CAPACITY + 1)
+    blobs = encode_blobs(data)
+    assert len(blobs) == 2
+    assert all(len(blob) == BLOB_SIZE for blob in blobs)
+    assert blobs[0] == encode_blob(data) == to_blobs_loop(data)
+    assert decode_blobs(blobs) == data
+    assert decode(b"".join(blobs)) == data
+
+
+def test_decode_from_memoryview_and_mmap():
+    data = payload(BLOB_CAPACITY + 1000)
+    joined = b"".join(encode_blobs(data))
+    assert decode(memoryview(joined)) == data
+    with tempfile.TemporaryFile() as f:
+        f.write(joined)
+        f.flush()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            assert decode(mapped) == data
+
+
+def test_decode_rejects_malformed_blobs():
+    with pytest.raises(ValueError):
+        decode(b"\x01" * BLOB_SIZE)
+    with pytest.raises(ValueError):
+        decode(bytes(BLOB_SIZE - 1))
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node not installed")
+def test_layout_matches_lambda_to_blobs():
+    with open(LAMBDA_PATH) as f:
+        function = re.search(r"function toBlobs\(data\) \{.*?\n\}", f.read(), re.DOTALL).group(0)
+    script = (
+        function
+        + "\nconst chunks = []; process.stdin.on('data', c => chunks.push(c));"
+        + "\nprocess.stdin.on('end', () => process.stdout.write(Buffer.from(toBlobs(Buffer.concat(chunks)))));"
+    )
+    data = payload(BLOB_CAPACITY + 1)
+    blob = subprocess.run(["node", "-e", script], input=data, capture_output=True, check=True).stdout
+    assert blob == encode_blob(data)
@@ -0,0 +1,235 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from eth_utils import keccak
+
+from api.rpc import RpcError
+from api.rpc_pool import RpcPool, write_rpc_pool
+
+load_dotenv()
+
+
+# Send errors meaning the node already holds this exact transaction
+ALREADY_KNOWN_ERRORS = ("already known", "known transaction", "already imported")
+# Send errors that may mean this transaction was already accepted (or another one used its nonce)
+NONCE_USED_ERRORS = ("nonce too low",)
+
+
+def raw_transaction_hash(raw: str) -> str:
+    """Transaction hash of a signed raw transaction: keccak256 of its bytes."""
+    return "0x" + keccak(hexstr=raw).hex()
+
+
+class TrackedTransaction:
+    def __init__(self, tx_hash: str):
+        self.tx_hash = tx_hash
+        self.status = "pending"
+        self.submitted_at = time.time()
+        self.receipt: Optional[dict] = None
+
+    def as_dict(self) -> dict:
+        receipt = self.receipt or {}
+        return {
+            "hash": self.tx_hash,
+            "status": self.status,
+            "submittedAt": self.submitted_at,
+            "blockNumber": int(receipt["blockNumber"], 16) if receipt.get("blockNumber") else None,
+            "receipt": self.receipt,
+        }
+
+
+class TransactionRelay:
+    """
+    Queue-based raw transaction relay.
+
+    Submitted transactions are forwarded by a single task that drains the queue and sends
+    whatever has accumulated as one JSON-RPC batch over the shared HTTP client. Accepted
+    hashes are tracked, and a receipt poller checks all pending hashes with one
+    eth_getTransactionReceipt batch per new block. Only pre-signed raw transactions are
+    relayed, so nonces are the signer's business; the relay does not manage them.
+    """
+
+    def __init__(
+        self,
+        rpc: RpcPool,
+        batch_size: int,
+        linger: float,
+        submit_timeout: float,
+        poll_interval: float,
+        pending_timeout: float,
+        history_size: int,
+    ):
+        self.rpc = rpc
+        self.batch_size = batch_size
+        self.linger = linger
+        self.submit_timeout = submit_timeout
+        self.poll_interval = poll_interval
+        self.pending_timeout = pending_timeout
+        self.history_size = history_size
+        self.last_block = 0
+        self._queue: "asyncio.Queue[Tuple[str, asyncio.Future]]" = asyncio.Queue()
+        self._tracked: "OrderedDict[str, TrackedTransaction]" = OrderedDict()
+        self._tasks: List[asyncio.Task] = []
+
+    @classmethod
+    def from_env(cls) -> "TransactionRelay":
+        return cls(
+            rpc=write_rpc_pool,
+            batch_size=int(os.getenv("RELAY_BATCH_SIZE", "20")),
+            linger=float(os.getenv("RELAY_BATCH_LINGER_MS", "5")) / 1000,
+            submit_timeout=float(os.getenv("RELAY_SUBMIT_TIMEOUT", "30")),
+            poll_interval=float(os.getenv("RELAY_RECEIPT_POLL_INTERVAL", "4")),
+            pending_timeout=float(os.getenv("RELAY_PENDING_TIMEOUT", "1800")),
+            history_size=int(os.getenv("RELAY_HISTORY_SIZE", "10000")),
+        )
+
+    def start(self) -> None:
+        if self.rpc.configured and not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._forward_loop()),
+                asyncio.create_task(self._receipt_loop()),
+            ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, raw: str) -> str:
+        """
+        Queue a signed raw transaction and wait until the node accepts (hash) or rejects it
+        (RpcError). Raises asyncio.TimeoutError after submit_timeout.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((raw, future))
+        return await asyncio.wait_for(future, self.submit_timeout)
+
+    def status(self, tx_hash: str) -> Optional[dict]:
+        tracked = self._tracked.get(tx_hash.lower())
+        return tracked.as_dict() if tracked else None
+
+    def stats(self) -> dict:
+        return {
+            "configured": self.rpc.configured,
+            "queued": self._queue.qsize(),
+            "pending": sum(1 for tx in self._tracked.values() if tx.status == "pending"),
+            "tracked": len(self._tracked),
+            "lastBlock": self.last_block,
+        }
+
+    def _track(self, tx_hash: str) -> None:
+        key = tx_hash.lower()
+        if key not in self._tracked:
+            self._tracked[key] = TrackedTransaction(tx_hash)
+        # Forget the oldest settled transactions beyond the history size
+        while len(self._tracked) > self.history_size:
+            oldest_key, oldest = next(iter(self._tracked.items()))
+            if oldest.status == "pending":
+                break
+            del self._tracked[oldest_key]
+
+    async def _forward_loop(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            # Give concurrent submissions a moment to join the same batch
+            if self.linger > 0:
+                await asyncio.sleep(self.linger)
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            batch = [(raw, future) for raw, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+            try:
+                await self._forward(batch)
+            except Exception as e:
+                # Never let one bad batch stop the forwarder
+                print(f"Relay forward failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _settle_resent(self, raws: List[str], results: List[Any]) -> List[Any]:
+        """
+        The pool fails over on timeouts and 5xx, which can come after a node already took the
+        transaction; the resend then fails with "already known" or "nonce too low". Those
+        sends are reported as accepted when the node holds the transaction.
+        """
+        unsure = []
+        for i, (raw, result) in enumerate(zip(raws, results)):
+            if not isinstance(result, RpcError):
+                continue
+            message = str(result).lower()
+            try:
+                if any(e in message for e in ALREADY_KNOWN_ERRORS):
+                    results[i] = raw_transaction_hash(raw)
+                elif any(e in message for e in NONCE_USED_ERRORS):
+                    unsure.append((i, raw_transaction_hash(raw)))
+            except ValueError:
+                continue
+        if unsure:
+            try:
+                found = await self.rpc.batch([("eth_getTransactionByHash", [h]) for _, h in unsure])
+            except Exception as e:
+                print(f"Relay lookup of resent transactions failed: {e}")
+                return results
+            for (i, tx_hash), tx in zip(unsure, found):
+                if isinstance(tx, dict):
+                    results[i] = tx_hash
+        return results
+
+    async def _forward(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        raws = [raw for raw, _ in batch]
+        try:
+            results: List[Any] = await self.rpc.batch(
+                [("eth_sendRawTransaction", [raw]) for raw in raws]
+            )
+            results = await self._settle_resent(raws, results)
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if not isinstance(result, (str, Exception)):
+                result = RpcError(f"RPC error: unexpected eth_sendRawTransaction result {result!r}")
+            if isinstance(result, Exception):
+                if not future.done():
+                    future.set_exception(result)
+                continue
+            self._track(result)
+            if not future.done():
+                future.set_result(result)
+
+    async def _receipt_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll_receipts()
+            except Exception as e:
+                print(f"Relay receipt poll failed: {e}")
+
+    async def poll_receipts(self) -> None:
+        pending = [tx for tx in self._tracked.values() if tx.status == "pending"]
+        if not pending:
+            return
+        head = int(await self.rpc.call("eth_blockNumber", []), 16)
+        if head <= self.last_block:
+            return
+        self.last_block = head
+        receipts = await self.rpc.batch(
+            [("eth_getTransactionReceipt", [tx.tx_hash]) for tx in pending]
+        )
+        now = time.time()
+        for tx, receipt in zip(pending, receipts):
+            if isinstance(receipt, RpcError):
+                continue
+            if receipt:
+                tx.receipt = receipt
+                tx.status = "confirmed" if receipt.get("status") == "0x1" else "failed"
+            elif now - tx.submitted_at > self.pending_timeout:
+                tx.status = "dropped"
+
+
+tx_relay = TransactionRelay.from_env()
@@ -0,0 +1,85 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class GenerationPool:
+    """
+    Bounded thread pool used to run blocking descriptor generation off the event loop.
+
+    A thread pool is used rather than a process pool because generation is dominated by
+    Etherscan I/O and relies on the monkeypatches applied in api.patched_erc7730.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, timeout: float, retry_after: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="erc7730-gen")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "GenerationPool":
+        max_workers = int(os.getenv("GENERATION_WORKERS", "4"))
+        return cls(
+            max_workers=max_workers,
+            max_pending=int(os.getenv("GENERATION_QUEUE_DEPTH", str(max_workers * 8))),
+            timeout=float(os.getenv("GENERATION_TIMEOUT", "60")),
+            retry_after=int(os.getenv("GENERATION_RETRY_AFTER", "5")),
+        )
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) in the pool.
+        Raises 503 (with Retry-After) when the queue is full and 504 when the job times out.
+        A timed-out job keeps its slot until the worker thread actually finishes.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Descriptor generation queue is full, please retry later",
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+            self._pending += 1
+
+        try:
+            future = self._executor.submit(functools.partial(fn, *args, **kwargs))
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            # Drops the job if it has not started yet; a running job cannot be interrupted
+            future.cancel()
+            raise HTTPException(
+                status_code=504,
+                detail=f"Descriptor generation timed out after {self.timeout:g}s",
+            )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+generation_pool = GenerationPool.from_env()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark and layout check for api.blob_codec.
+
+Compares the vectorized codec with a byte-at-a-time port of toBlobs from
+lambda/kms-blob-lambda.js on a 128 KiB spec-like payload (which spans two blobs) and a
+single full blob. When node is available, the blob built by the Lambda's own toBlobs is
+checked byte for byte against the codec. Run from the backend/ directory:
+
+    python -m benchmarks.bench_blob_codec [iterations]
+"""
+import mmap
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import api.blob_codec as codec
+
+LAMBDA_PATH = os.path.join(os.path.dirname(__file__), "..", "lambda", "kms-blob-lambda.js")
+
+
+def to_blobs_loop(data: bytes) -> bytes:
+    """Line-by-line port of the Lambda's toBlobs."""
+    blob = bytearray(codec.BLOB_SIZE)
+    for i, byte in enumerate(data):
+        field_index, byte_index = divmod(i, 31)
+        if field_index >= 4096:
+            break
+        blob[field_index * 32 + byte_index + 1] = byte
+    return bytes(blob)
+
+
+def from_blobs_loop(blob: bytes) -> bytes:
+    out = bytearray()
+    for field_index in range(4096):
+        out += blob[field_index * 32 + 1:field_index * 32 + 32]
+    return bytes(out).rstrip(b"\0")
+
+
+def js_to_blobs(data: bytes) -> bytes:
+    """Blob built by the Lambda's toBlobs itself, extracted from the source and run with node."""
+    with open(LAMBDA_PATH) as f:
+        source = f.read()
+    function = re.search(r"function toBlobs\(data\) \{.*?\n\}", source, re.DOTALL).group(0)
+    script = (
+        function
+        + "\nconst chunks = []; process.stdin.on('data', c => chunks.push(c));"
+        + "\nprocess.stdin.on('end', () => process.stdout.write(Buffer.from(toBlobs(Buffer.concat(chunks)))));"
+    )
+    return subprocess.run(["node", "-e", script], input=data, capture_output=True, check=True).stdout
+
+
+def spec_payload(size: int) -> bytes:
+    unit = b'{"path":"amount","label":"Amount to send","format":"tokenAmount"},'
+    body = (unit * (size // len(unit) + 1))[: size - 2]
+    return b"[" + body[:-1] + b"]}"
+
+
+def bench(name, fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    print(f"{name:<44} {(time.perf_counter() - start) / iterations * 1000:9.3f} ms")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    spec = spec_payload(128 * 1024)
+    single = spec[: codec.BLOB_CAPACITY]
+
+    # Layout checks
+    blobs = codec.encode_blobs(spec)
+    assert len(blobs) == 2
+    assert codec.encode_blob(spec) == to_blobs_loop(spec) == blobs[0]
+    assert codec.decode_blobs(blobs) == spec
+    assert codec.decode(b"".join(blobs)) == spec
+    assert codec.decode(blobs[0]) == from_blobs_loop(blobs[0]) == single
+    if shutil.which("node"):
+        assert js_to_blobs(spec) == codec.encode_blob(spec), "layout differs from the Lambda's toBlobs"
+        print("layout matches lambda/kms-blob-lambda.js toBlobs")
+    else:
+        print("node not found; skipping check against the Lambda's toBlobs")
+
+    with tempfile.TemporaryFile() as f:
+        f.write(b"".join(blobs))
+        f.flush()
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        assert codec.decode(mapped) == spec
+
+        print(f"payload {len(spec)} bytes -> {len(blobs)} blobs of {codec.BLOB_SIZE} bytes")
+        bench("before: toBlobs loop, 1 blob", lambda: to_blobs_loop(single), iterations)
+        bench("after: encode_blob, 1 blob", lambda: codec.encode_blob(single), iterations)
+        bench("after: encode_blobs, 128 KiB (2 blobs)", lambda: codec.encode_blobs(spec), iterations)
+        bench("before: field-by-field decode, 1 blob", lambda: from_blobs_loop(blobs[0]), iterations)
+        bench("after: decode, 1 blob", lambda: codec.decode(blobs[0]), iterations)
+        bench("after: decode_blobs, 128 KiB (2 blobs)", lambda: codec.decode_blobs(blobs), iterations)
+        bench("after: decode from mmap, 128 KiB (2 blobs)", lambda: codec.decode(mapped), iterations)
+        mapped.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark for encoding generated ERC7730 descriptors into response bytes.
+
+Compares the previous path (result.json() -> json.loads -> JSONResponse re-encode) with
+api.patched_erc7730.serialize_descriptor, reporting wall time and peak allocation per
+descriptor. Descriptors are generated once up front, so only serialization is measured.
+ABIs come from the repo (contracts/abi and ERC7730 files embedding context.contract.abi)
+plus a synthetic ABI with many functions. Run from the backend/ directory:
+
+    python -m benchmarks.bench_descriptor_serialization [iterations] [abi.json ...]
+"""
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from fastapi.responses import JSONResponse
+
+from api.patched_erc7730 import original_generate_descriptor, serialize_descriptor
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_ABI_GLOBS = [
+    os.path.join(REPO_ROOT, "contracts", "abi", "*.json"),
+    os.path.join(REPO_ROOT, "frontend", "public", "erc7730", "*.json"),
+]
+SYNTHETIC_FUNCTIONS = 500
+
+
+def load_abi(path):
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("abi") or data.get("context", {}).get("contract", {}).get("abi")
+    return data if isinstance(data, list) else None
+
+
+def synthetic_abi(functions):
+    """A large ABI of distinct functions with mixed argument types."""
+    types = ["address", "uint256", "bytes32", "bool", "address[]", "uint256[]", "bytes", "string"]
+    return [
+        {
+            "type": "function",
+            "name": f"operation{i}",
+            "stateMutability": "nonpayable",
+            "inputs": [{"name": f"arg{j}", "type": types[(i + j) % len(types)]} for j in range(1 + i % 6)],
+            "outputs": [],
+        }
+        for i in range(functions)
+    ]
+
+
+def old_path(result):
+    return JSONResponse(content=json.loads(result.json())).body
+
+
+def measure(fn, result, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(result)
+    elapsed = (time.perf_counter() - start) / iterations
+    tracemalloc.start()
+    fn(result)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    paths = sys.argv[2:] or sorted(p for pattern in DEFAULT_ABI_GLOBS for p in glob.glob(pattern))
+    abis = [(os.path.basename(p), load_abi(p)) for p in paths]
+    abis = [(name, abi) for name, abi in abis if abi]
+    abis.append((f"synthetic ({SYNTHETIC_FUNCTIONS} functions)", synthetic_abi(SYNTHETIC_FUNCTIONS)))
+
+    print(f"{'ABI':<48} {'bytes':>9} {'before':>10} {'after':>10} {'peak before':>12} {'peak after':>11}")
+    for name, abi in abis:
+        try:
+            result = original_generate_descriptor(
+                chain_id=1, contract_address="0xdeadbeef00000000000000000000000000000000", abi=json.dumps(abi)
+            )
+        except Exception as e:
+            print(f"{name:<48} generation failed: {e}")
+            continue
+        assert json.loads(serialize_descriptor(result)) == json.loads(old_path(result)), name
+        before, peak_before = measure(old_path, result, iterations)
+        after, peak_after = measure(serialize_descriptor, result, iterations)
+        print(
+            f"{name[:48]:<48} {len(serialize_descriptor(result)):>9} "
+            f"{before * 1000:>8.2f}ms {after * 1000:>8.2f}ms "
+            f"{peak_before / 1024:>10.0f}KB {peak_after / 1024:>9.0f}KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the recovery-id step of KmsEthereumSigner.sign_digest.
+
+Compares the previous approach (trial public key recovery with the pure-Python eth_keys
+backend for ids 0 and 1) with api.kms.compute_recovery_id, using local keys so no KMS
+access is needed. Run from the backend/ directory:
+
+    python -m benchmarks.bench_recovery_id [iterations]
+"""
+import os
+import sys
+import time
+
+from eth_keys.backends.native.ecdsa import ecdsa_raw_recover, ecdsa_raw_sign, private_key_to_public_key
+
+import api.kms as kms
+
+
+def trial_recovery_id(digest: bytes, r: int, s: int, pubkey_bytes: bytes):
+    for rec_id in (0, 1):
+        try:
+            if ecdsa_raw_recover(digest, (rec_id, r, s)) == pubkey_bytes:
+                return rec_id
+        except Exception:
+            continue
+    return None
+
+
+def make_samples(count: int):
+    samples = []
+    for _ in range(count):
+        private_key = os.urandom(32)
+        pubkey_bytes = private_key_to_public_key(private_key)
+        digest = os.urandom(32)
+        v, r, s = ecdsa_raw_sign(digest, private_key)
+        r, s, flipped = kms.KmsEthereumSigner._ensure_low_s(r, s)
+        samples.append((digest, r, s, pubkey_bytes, v ^ int(flipped)))
+    return samples
+
+
+def bench(name, fn, samples):
+    start = time.process_time()
+    for digest, r, s, pubkey_bytes, expected in samples:
+        assert fn(digest, r, s, pubkey_bytes) == expected, name
+    elapsed = time.process_time() - start
+    print(f"{name:<40} {elapsed / len(samples) * 1e6:10.1f} us/signature (CPU)")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    samples = make_samples(iterations)
+
+    bench("before: trial ecdsa_raw_recover", trial_recovery_id, samples)
+
+    coincurve = kms.CoincurvePublicKey
+    kms.CoincurvePublicKey = None
+    bench("after: native nonce-point parity", kms.compute_recovery_id, samples)
+    kms.CoincurvePublicKey = coincurve
+
+    if coincurve is not None:
+        bench("after: coincurve (libsecp256k1)", kms.compute_recovery_id, samples)
+    else:
+        print("coincurve not installed; skipping libsecp256k1 path")
+
+
+if __name__ == "__main__":
+    main()
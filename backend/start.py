@@ -16,7 +16,8 @@ def main():
     # Set default values for required environment variables
     if not os.environ.get("USE_MOCK"):
         # Default to mock mode if no Etherscan API key is available
-        os.environ["USE_MOCK"] = "true" if not os.environ.get("ETHERSCAN_API_KEY") else "false"
+        has_key = os.environ.get("ETHERSCAN_API_KEY") or os.environ.get("ETHERSCAN_API_KEYS")
+        os.environ["USE_MOCK"] = "false" if has_key else "true"
     
     # Get port from environment variable (Railway sets this)
     port = int(os.environ.get("PORT", 8000))
@@ -28,6 +29,8 @@ def main():
     if os.environ.get("ETHERSCAN_API_KEY"):
         # Don't show the full API key, just that it's set
         print(f"ETHERSCAN_API_KEY: {os.environ.get('ETHERSCAN_API_KEY')[:4]}...")
+    elif os.environ.get("ETHERSCAN_API_KEYS"):
+        print(f"ETHERSCAN_API_KEYS: {len(os.environ['ETHERSCAN_API_KEYS'].split(','))} keys")
     else:
         print("ETHERSCAN_API_KEY not set - using mock data")
     
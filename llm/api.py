@@ -1,10 +1,17 @@
+import asyncio
+import hashlib
 import json
 import re
 import os
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from google import genai
+from google.genai import types
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -28,113 +35,248 @@ api_key = os.getenv("GOOGLE_GENAI_API_KEY")
 if not api_key:
     raise ValueError("GOOGLE_GENAI_API_KEY environment variable is not set")
 
-client = genai.Client(api_key=api_key)
+# GEMINI_BASE_URL points the client at another endpoint, e.g. a local fake model server in tests
+base_url = os.getenv("GEMINI_BASE_URL")
+client = genai.Client(
+    api_key=api_key,
+    http_options=types.HttpOptions(base_url=base_url) if base_url else None,
+)
+
+MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+# Bump whenever the prompt changes so cached evaluations of the old prompt are not reused
+PROMPT_VERSION = "2"
+# Gemini requests in flight at once across all evaluations
+llm_semaphore = asyncio.Semaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "8")))
+# Limits for /evaluate/batch
+BATCH_MAX_SPECS = int(os.getenv("LLM_BATCH_MAX_SPECS", "500"))
+BATCH_ITEM_TIMEOUT = float(os.getenv("LLM_BATCH_ITEM_TIMEOUT", "60"))
+
+class EvaluationCache:
+    """SQLite cache of evaluation results keyed by spec hash, model and prompt version."""
+
+    def __init__(self, db_path: Optional[str]):
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS evaluations (key TEXT PRIMARY KEY, result TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT result FROM evaluations WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, result: dict) -> None:
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO evaluations (key, result) VALUES (?, ?)", (key, json.dumps(result))
+            )
+            self._db.commit()
+
+evaluation_cache = EvaluationCache(os.getenv("LLM_CACHE_PATH", "/tmp/kaisign/llm_evaluations.sqlite3"))
+
+def evaluation_key(spec: dict) -> str:
+    """Canonical hash of the spec (key order and whitespace insensitive) plus model and prompt version."""
+    canonical = json.dumps(spec, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(f"{MODEL_NAME}\n{PROMPT_VERSION}\n{canonical}".encode()).hexdigest()
 
 # Define the request model
 class SpecRequest(BaseModel):
     spec: dict
 
-@app.post("/evaluate")
-async def evaluate_spec(request: SpecRequest):
-    try:
-        # Validate input
-        if not request.spec:
-            raise HTTPException(status_code=400, detail="Spec cannot be empty")
-        
-        # Convert the spec dict to a JSON string
-        user_spec = json.dumps(request.spec, indent=2)
-        
-        # Define the prompt with the good example and user's spec
-        prompt = f"""
-        Evaluate the following ERC7730 JSON specification based on these criteria:
-        1. It must include a properly formatted Ethereum address (42-character string starting with '0x' followed by 40 hex characters).
-        2. Each function or type listed in the 'display.formats' section must have a clear, human-readable 'intent' describing its purpose.
-
-        Here is an example of a good ERC7730 spec for reference:
-        {{
-          "$schema": "../../specs/erc7730-v1.schema.json",
-          "context": {{
-            "eip712": {{
-              "deployments": [{{"chainId": 137, "address": "0xdb46d1dc155634fbc732f92e853b10b288ad5a1d"}}],
-              "domain": {{"name": "Dispatch", "chainId": 137, "verifyingContract": "0xdb46d1dc155634fbc732f92e853b10b288ad5a1d"}},
-              "schemas": [
-                {{
-                  "primaryType": "FollowWithSig",
-                  "types": {{
-                    "EIP712Domain": [
-                      {{"name": "chainId", "type": "uint256"}},
-                      {{"name": "name", "type": "string"}},
-                      {{"name": "verifyingContract", "type": "address"}},
-                      {{"name": "version", "type": "string"}}
-                    ],
-                    "FollowWithSig": [
-                      {{"name": "datas", "type": "bytes[]"}},
-                      {{"name": "deadline", "type": "uint256"}},
-                      {{"name": "nonce", "type": "uint256"}},
-                      {{"name": "profileIds", "type": "uint256[]"}}
-                    ]
-                  }}
-                }}
-              ]
-            }}
-          }},
-          "metadata": {{"owner": "Dispatch.xyz"}},
-          "display": {{
-            "formats": {{
-              "FollowWithSig": {{
-                "intent": "Dispatch.xyz Follow Profile",
-                "fields": [
-                  {{"path": "profileIds.[]", "label": "Profile Ids", "format": "raw"}},
-                  {{"path": "datas.[]", "label": "Data", "format": "raw"}},
-                  {{"path": "nonce", "label": "Nonce", "format": "raw"}},
-                  {{"path": "deadline", "label": "Expiration Date", "format": "raw"}}
+class BatchSpecRequest(BaseModel):
+    specs: List[dict]
+
+ADDRESS_PATTERN = re.compile(r"^0x[0-9a-fA-F]{40}$")
+
+def spec_addresses(spec: dict) -> List[object]:
+    """Deployment addresses and the EIP-712 verifying contract declared in the spec's context."""
+    context = spec.get("context") if isinstance(spec.get("context"), dict) else {}
+    addresses = []
+    for section in ("contract", "eip712"):
+        part = context.get(section) if isinstance(context.get(section), dict) else {}
+        deployments = part.get("deployments") if isinstance(part.get("deployments"), list) else []
+        addresses.extend(d.get("address") for d in deployments if isinstance(d, dict) and "address" in d)
+        if isinstance(part.get("domain"), dict) and "verifyingContract" in part["domain"]:
+            addresses.append(part["domain"]["verifyingContract"])
+    return addresses
+
+def prevalidate(spec: dict) -> List[str]:
+    """
+    Deterministic checks for the two prompt criteria. Returns the problems found;
+    a spec with any problem fails without asking the model.
+    """
+    issues = []
+    addresses = spec_addresses(spec)
+    if not addresses:
+        issues.append("No contract address found in context deployments or EIP-712 domain")
+    for address in addresses:
+        if not isinstance(address, str) or not ADDRESS_PATTERN.match(address):
+            issues.append(f"Invalid Ethereum address: {address!r}")
+
+    display = spec.get("display") if isinstance(spec.get("display"), dict) else {}
+    formats = display.get("formats")
+    if not isinstance(formats, dict) or not formats:
+        issues.append("display.formats is missing or empty")
+    else:
+        for name, entry in formats.items():
+            intent = entry.get("intent") if isinstance(entry, dict) else None
+            # ERC7730 allows a plain string or a key/value object as intent
+            if not intent or not isinstance(intent, (str, dict)) or (isinstance(intent, str) and not intent.strip()):
+                issues.append(f"display.formats entry {name!r} has no intent")
+    return issues
+
+def compact_spec(spec: dict) -> dict:
+    """Copy of the spec without bulk the criteria do not need (contract ABI, EIP-712 schemas)."""
+    compact = dict(spec)
+    context = spec.get("context")
+    if isinstance(context, dict):
+        compact["context"] = dict(context)
+        for section, bulk in (("contract", "abi"), ("eip712", "schemas")):
+            part = context.get(section)
+            if isinstance(part, dict) and isinstance(part.get(bulk), list):
+                compact["context"][section] = {
+                    **part, bulk: f"<{len(part[bulk])} entries omitted>"
+                }
+    return compact
+
+def build_prompt(spec: dict) -> str:
+    # Convert the compacted spec dict to a JSON string
+    user_spec = json.dumps(compact_spec(spec), indent=2)
+
+    # Define the prompt with the good example and user's spec
+    prompt = f"""
+    Evaluate the following ERC7730 JSON specification based on these criteria:
+    1. It must include a properly formatted Ethereum address (42-character string starting with '0x' followed by 40 hex characters).
+    2. Each function or type listed in the 'display.formats' section must have a clear, human-readable 'intent' describing its purpose.
+
+    Here is an example of a good ERC7730 spec for reference:
+    {{
+      "$schema": "../../specs/erc7730-v1.schema.json",
+      "context": {{
+        "eip712": {{
+          "deployments": [{{"chainId": 137, "address": "0xdb46d1dc155634fbc732f92e853b10b288ad5a1d"}}],
+          "domain": {{"name": "Dispatch", "chainId": 137, "verifyingContract": "0xdb46d1dc155634fbc732f92e853b10b288ad5a1d"}},
+          "schemas": [
+            {{
+              "primaryType": "FollowWithSig",
+              "types": {{
+                "EIP712Domain": [
+                  {{"name": "chainId", "type": "uint256"}},
+                  {{"name": "name", "type": "string"}},
+                  {{"name": "verifyingContract", "type": "address"}},
+                  {{"name": "version", "type": "string"}}
+                ],
+                "FollowWithSig": [
+                  {{"name": "datas", "type": "bytes[]"}},
+                  {{"name": "deadline", "type": "uint256"}},
+                  {{"name": "nonce", "type": "uint256"}},
+                  {{"name": "profileIds", "type": "uint256[]"}}
                 ]
               }}
             }}
+          ]
+        }}
+      }},
+      "metadata": {{"owner": "Dispatch.xyz"}},
+      "display": {{
+        "formats": {{
+          "FollowWithSig": {{
+            "intent": "Dispatch.xyz Follow Profile",
+            "fields": [
+              {{"path": "profileIds.[]", "label": "Profile Ids", "format": "raw"}},
+              {{"path": "datas.[]", "label": "Data", "format": "raw"}},
+              {{"path": "nonce", "label": "Nonce", "format": "raw"}},
+              {{"path": "deadline", "label": "Expiration Date", "format": "raw"}}
+            ]
           }}
         }}
+      }}
+    }}
 
-        Now, evaluate this spec:
-        {user_spec}
+    Now, evaluate this spec:
+    {user_spec}
 
-        Return your evaluation in this exact JSON format: {{"Good": XX%, "Bad": XX%}}, where XX% is your confidence level. Do not include any additional text or explanations.
-        """
+    Return your evaluation in this exact JSON format: {{"Good": XX%, "Bad": XX%}}, where XX% is your confidence level. Do not include any additional text or explanations.
+    """
+    return prompt
 
-        # Send the request to Gemini
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt
+def extract_result(result_text: str) -> Tuple[dict, bool]:
+    """Parse the model's Good/Bad answer. The flag is False when the answer could not be read."""
+    parsed = True
+    # Try multiple approaches to extract valid JSON
+    try:
+        # First attempt: Direct JSON parsing if response is already JSON
+        result_dict = json.loads(result_text)
+    except json.JSONDecodeError:
+        # Second attempt: Use regex to find JSON-like pattern
+        json_match = re.search(r'(\{.*"Good".*"Bad".*\})', result_text, re.DOTALL)
+        if json_match:
+            try:
+                result_json = json_match.group(1)
+                result_dict = json.loads(result_json)
+            except json.JSONDecodeError:
+                # If still failing, create a dictionary from the text
+                good_match = re.search(r'"Good":\s*"?(\d+)%"?', result_text)
+                bad_match = re.search(r'"Bad":\s*"?(\d+)%"?', result_text)
+                
+                if good_match and bad_match:
+                    result_dict = {
+                        "Good": f"{good_match.group(1)}%",
+                        "Bad": f"{bad_match.group(1)}%"
+                    }
+                else:
+                    result_dict = {"Good": "0%", "Bad": "100%"}
+                    parsed = False
+        else:
+            result_dict = {"Good": "0%", "Bad": "100%"}
+            parsed = False
+    return result_dict, parsed
+
+async def evaluate(spec: dict, timeout: Optional[float] = None) -> dict:
+    """
+    Evaluate a spec with Gemini, serving repeat evaluations from the cache.
+    timeout bounds the model call itself, not the wait for a concurrency slot.
+    """
+    # Structural failures are decided locally, without an LLM call
+    issues = prevalidate(spec)
+    if issues:
+        return {"Good": "0%", "Bad": "100%", "issues": issues}
+
+    key = evaluation_key(spec)
+    cached = await asyncio.to_thread(evaluation_cache.get, key)
+    if cached is not None:
+        return cached
+
+    # Send the request to Gemini without blocking the event loop
+    async with llm_semaphore:
+        response = await asyncio.wait_for(
+            client.aio.models.generate_content(model=MODEL_NAME, contents=build_prompt(spec)),
+            timeout,
         )
-        
-        result_text = response.text.strip()
-        
-        # Try multiple approaches to extract valid JSON
-        try:
-            # First attempt: Direct JSON parsing if response is already JSON
-            result_dict = json.loads(result_text)
-        except json.JSONDecodeError:
-            # Second attempt: Use regex to find JSON-like pattern
-            json_match = re.search(r'(\{.*"Good".*"Bad".*\})', result_text, re.DOTALL)
-            if json_match:
-                try:
-                    result_json = json_match.group(1)
-                    result_dict = json.loads(result_json)
-                except json.JSONDecodeError:
-                    # If still failing, create a dictionary from the text
-                    good_match = re.search(r'"Good":\s*"?(\d+)%"?', result_text)
-                    bad_match = re.search(r'"Bad":\s*"?(\d+)%"?', result_text)
-                    
-                    if good_match and bad_match:
-                        result_dict = {
-                            "Good": f"{good_match.group(1)}%",
-                            "Bad": f"{bad_match.group(1)}%"
-                        }
-                    else:
-                        result_dict = {"Good": "0%", "Bad": "100%"}
-            else:
-                result_dict = {"Good": "0%", "Bad": "100%"}
-        
-        return result_dict
+
+    result_dict, parsed = extract_result(response.text.strip())
+    # Unreadable answers are not cached, so the next request asks the model again
+    if parsed:
+        await asyncio.to_thread(evaluation_cache.set, key, result_dict)
+    return result_dict
+
+@app.post("/evaluate")
+async def evaluate_spec(request: SpecRequest):
+    try:
+        # Validate input
+        if not request.spec:
+            raise HTTPException(status_code=400, detail="Spec cannot be empty")
+
+        return await evaluate(request.spec)
         
     except json.JSONDecodeError as e:
         raise HTTPException(status_code=400, detail=f"Invalid JSON in spec: {str(e)}")
@@ -146,6 +288,53 @@ async def evaluate_spec(request: SpecRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="An internal error occurred while processing your request")
 
+@app.post("/evaluate/batch")
+async def evaluate_specs(request: BatchSpecRequest):
+    """
+    Evaluate many specs. Identical specs are evaluated once; Gemini calls share the
+    LLM_MAX_CONCURRENCY cap and each call gets BATCH_ITEM_TIMEOUT seconds once it has a slot.
+    Streams one NDJSON line per input spec as results complete:
+    {"index": i, "result": {"Good": ..., "Bad": ...}} or {"index": i, "error": ...}.
+    """
+    if len(request.specs) > BATCH_MAX_SPECS:
+        raise HTTPException(
+            status_code=413, detail=f"Too many specs: {len(request.specs)} (max {BATCH_MAX_SPECS})"
+        )
+
+    # Input positions per distinct spec
+    indices_by_key = {}
+    specs_by_key = {}
+    for index, spec in enumerate(request.specs):
+        key = evaluation_key(spec)
+        indices_by_key.setdefault(key, []).append(index)
+        specs_by_key[key] = spec
+
+    async def evaluate_one(key: str) -> Tuple[str, dict]:
+        spec = specs_by_key[key]
+        if not spec:
+            return key, {"error": "Spec cannot be empty"}
+        try:
+            return key, {"result": await evaluate(spec, timeout=BATCH_ITEM_TIMEOUT)}
+        except asyncio.TimeoutError:
+            return key, {"error": f"Evaluation timed out after {BATCH_ITEM_TIMEOUT:g}s"}
+        except Exception as e:
+            print(f"Batch evaluation failed: {e}")
+            return key, {"error": "An internal error occurred while evaluating this spec"}
+
+    async def lines():
+        tasks = [asyncio.ensure_future(evaluate_one(key)) for key in indices_by_key]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                key, outcome = await next_done
+                for index in indices_by_key[key]:
+                    yield json.dumps({"index": index, **outcome}) + "\n"
+        finally:
+            # Client went away: stop evaluating the rest
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 # Add a health check endpoint
 @app.get("/health")
 async def health_check():